@@ -13,6 +13,8 @@ from datetime import datetime
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
+from http_client import use_client
+
 class AdvancedScraper:
     """Enhanced scraper with multiple strategies for different site types."""
     
@@ -366,12 +368,13 @@ class AdvancedScraper:
         
         return jobs
 
-    async def scrape_company_advanced(self, company_name: str, url: str) -> List[Dict[str, Any]]:
-        """Main method to scrape a company using advanced techniques."""
+    async def scrape_company_advanced(self, company_name: str, url: str,
+                                      client: Optional[httpx.AsyncClient] = None) -> List[Dict[str, Any]]:
+        """Main method to scrape a company using advanced techniques; ``client`` is the run's shared client."""
         jobs = []
         
         try:
-            async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
+            async with use_client(client) as client:
                 print(f"🔍 Analyzing {company_name} at {url}")
                 
                 # Detect site type
@@ -1,30 +1,61 @@
-from fastapi import FastAPI, Depends, Query
+from fastapi import FastAPI, Depends, Query, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, or_, select, true
 from typing import List, Optional
 from datetime import datetime
 from contextlib import asynccontextmanager
-from db import SessionLocal, init_db, Job
-from models import JobOut, JobIn
-from util import score_job
+from itertools import islice
+import threading
+import uuid
+import orjson
+from db import SessionLocal, AsyncSessionLocal, async_engine, init_db, Job, JobRegion, JobType, JobStats, JOB_STATS_ID, assign_regions, assign_job_types, bulk_upsert_jobs, get_generation, bump_generation, refresh_job_stats, acquire_ingestion_lease, release_ingestion_lease, fts_enabled, fts_match_query, fts_search
+from models import JobOut, JobIn, JobCard
+from util import job_features, job_vocabulary, annotate_jobs, content_hash, job_snippet
+from cache import score_cache, response_cache, CachedResponse
+from regions import filter_regions, region_label
+from job_types import filter_job_types
+from http_cache import validators, not_modified, wants_ndjson
+from pagination import Cursor, encode_cursor, decode_cursor, sort_key, after_cursor
+from search_index import search_index
+from facets import facet_index
 from scrapers import lever as lever_scraper
 from scrapers import greenhouse as greenhouse_scraper
 from scheduler import start_scheduler, stop_scheduler
+from settings import settings
+from compression import COMPRESSIBLE_TYPES, CompressionMiddleware, Compressor, choose_encoding, compress_chunks
+from export import EXPORT_COLUMNS, MEDIA_TYPES, export_chunks, stream_export, parquet_available
 
 # Global scheduler variable
 scheduler = None
 
+# Generation this worker's search and facet indexes are up to date with (see catch_up_indexes)
+indexed_generation = None
+index_lock = threading.Lock()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application startup and shutdown."""
-    global scheduler
+    global scheduler, indexed_generation
     # Startup
     init_db()
+    db = SessionLocal()
+    try:
+        generation, _ = get_generation(db)
+        if settings.SEARCH_BACKEND == "index":
+            search_index.build(db)
+        facet_index.build(db)
+        indexed_generation = generation
+    finally:
+        db.close()
     scheduler = start_scheduler()
     yield
     # Shutdown
     stop_scheduler(scheduler)
+    await async_engine.dispose()
 
 app = FastAPI(title="biodsjobs API", version="0.1.0", lifespan=lifespan)
 
@@ -34,230 +65,578 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
+)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
 )
 
-def get_db():
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_sync_db():
+    """Session for the CPU-bound endpoints (scoring, facets, exports), which run in the threadpool."""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+def sync_indexes(rows=None):
+    """Bring the search and facet indexes up to date after a commit; ``rows`` limits the search index to those jobs."""
+    db = SessionLocal()
+    try:
+        if rows is None:
+            search_index.refresh(db)
+        else:
+            search_index.update(rows)
+        facet_index.refresh(db)
+    finally:
+        db.close()
+
+def publish_changes(rows=None, run_at=None):
+    """After new job data was committed: refresh this worker's indexes, then bump the generation.
+
+    In that order nothing computed from indexes that lag behind the data is
+    cached or tagged with the new generation. ``rows`` and ``run_at`` are
+    passed on to sync_indexes and db.bump_generation.
+    """
+    global indexed_generation
+    with index_lock:
+        previous = indexed_generation
+        sync_indexes(rows)
+        db = SessionLocal()
+        try:
+            generation = bump_generation(db, run_at)
+        finally:
+            db.close()
+        # Unless another process committed in between, the indexes are current for the new generation
+        if previous is not None and generation == previous + 1:
+            indexed_generation = generation
+
+def catch_up_indexes(generation):
+    """Refresh this worker's indexes if ``generation`` is newer than the one they are up to date with.
+
+    Each gunicorn worker keeps its own indexes and response cache, but only
+    the process that committed new data (an API write, the scheduler or the
+    ingestor) refreshed its own; the others catch up here, before anything
+    of that generation is served or cached.
+    """
+    global indexed_generation
+    with index_lock:
+        if indexed_generation is not None and generation <= indexed_generation:
+            return
+        sync_indexes()
+        indexed_generation = generation
+        response_cache.clear()  # Entries of older generations are never served again
+
+def current_generation(db: Session):
+    """db.get_generation for a read endpoint, with this worker's indexes brought up to it."""
+    generation = get_generation(db)
+    if generation[0] != indexed_generation:
+        catch_up_indexes(generation[0])
+    return generation
+
+async def read_generation(db: AsyncSession):
+    """current_generation for the endpoints on the async session; a catch-up runs in the threadpool."""
+    generation = await db.run_sync(get_generation)
+    if generation[0] != indexed_generation:
+        await run_in_threadpool(catch_up_indexes, generation[0])
+    return generation
+
 @app.get("/api/health")
 def health():
-    return {"status": "ok", "time": datetime.utcnow().isoformat()}
+    return {"status": "ok", "time": datetime.utcnow().isoformat(), "score_cache": score_cache.stats(),
+            "search_index": search_index.stats(), "facet_index": facet_index.stats(),
+            "response_cache": response_cache.stats()}
+
+def revalidate(request: Request, generation):
+    """Validators of a read endpoint, plus the response to send without recomputing it.
+
+    ``generation`` is the (generation, updated_at) pair of current_generation
+    or read_generation.
+    The response is a 304 when the client's copy is current, or the response
+    cache entry for the same generation and normalized request.
+    """
+    current = validators(request, *generation)
+    if not_modified(request, current):
+        return current, Response(status_code=304, headers=current.headers)
+    cached = response_cache.get(current.etag)
+    if cached is not None:
+        return current, cached.response()
+    return current, None
+
+def remember(current, response):
+    """Store a freshly built read endpoint response in the response cache."""
+    response_cache.set(current.etag, CachedResponse.of(response))
+    return response
+
+def json_response(content, headers=None) -> Response:
+    """JSON response serialized by orjson (datetimes, numpy values and non-string keys included)."""
+    body = orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return Response(body, media_type="application/json", headers=headers)
 
 @app.get("/api/locations")
-def get_locations(db: Session = Depends(get_db)):
-    """Get all unique locations from jobs for location filter dropdown."""
-    locations = db.query(Job.location).distinct().filter(Job.location != "").all()
-    location_list = [loc[0] for loc in locations if loc[0]]
-    
-    # Add common location groupings
-    common_locations = [
-        "Remote",
-        "San Francisco Bay Area", 
-        "Boston/Cambridge",
-        "New York City",
-        "Seattle",
-        "Los Angeles",
-        "San Diego",
-        "Chicago",
-        "Washington DC"
-    ]
-    
-    # Combine and sort
-    all_locations = common_locations + [loc for loc in location_list if loc not in common_locations]
-    return sorted(set(all_locations))
+async def get_locations(request: Request, db: AsyncSession = Depends(get_db)):
+    """Get the canonical regions that have jobs, for the location filter dropdown."""
+    current, early = revalidate(request, await read_generation(db))
+    if early:
+        return early
+    regions = (await db.execute(select(JobRegion.region).distinct())).scalars()
+    locations = sorted(region_label(code) for code in regions)
+    return remember(current, json_response(locations, headers=current.headers))
 
 @app.get("/api/stats")
-def get_stats(db: Session = Depends(get_db)):
-    """Get summary statistics about jobs in the database."""
-    from sqlalchemy import func
-    
-    total_jobs = db.query(Job).count()
-    total_companies = db.query(Job.company).distinct().count()
-    total_sources = db.query(Job.source).distinct().count()
-    
-    # Get jobs by source
-    sources = db.query(Job.source, func.count(Job.id).label('count')).group_by(Job.source).all()
-    source_stats = {source: count for source, count in sources}
+async def get_stats(request: Request, db: AsyncSession = Depends(get_db)):
+    """Get summary statistics about jobs in the database, read from the job_stats row."""
+    current, early = revalidate(request, await read_generation(db))
+    if early:
+        return early
     
-    # Get most recent job date
-    latest_job = db.query(Job.posted_at).order_by(Job.posted_at.desc()).first()
-    latest_date = latest_job[0] if latest_job else None
+    row = await db.get(JobStats, JOB_STATS_ID)
+    if row is None:  # Not materialized yet
+        row = await db.run_sync(refresh_job_stats)
+        await db.commit()
     
-    return {
-        "total_jobs": total_jobs,
-        "total_companies": total_companies,
-        "total_sources": total_sources,
-        "sources": source_stats,
-        "latest_job_date": latest_date
+    sources = row.sources or {}
+    stats = {
+        "total_jobs": row.total_jobs,
+        "total_companies": row.total_companies,
+        "total_sources": row.total_sources,
+        "sources": {source: info["jobs"] for source, info in sources.items()},
+        "latest_job_date": row.latest_job_date,
+        "last_run_at": row.last_run_at,
+        # Per source: newest posting and the last time ingestion returned one of its jobs
+        "freshness": {
+            source: {"latest_job_date": info["latest_job_date"], "last_seen_at": info["last_seen_at"]}
+            for source, info in sources.items()
+        },
+        "companies": row.companies or {},
+        "regions": {region_label(code): count for code, count in (row.regions or {}).items()},
     }
+    return remember(current, json_response(stats, headers=current.headers))
 
-@app.get("/api/jobs", response_model=List[JobOut])
-def list_jobs(
+def uses_search_index(q):
+    """Whether a search is answered by the in-process search index rather than the database."""
+    return bool(q and q.strip()) and settings.SEARCH_BACKEND == "index" and search_index.ready
+
+def search_query(query, q):
+    """Restrict a Job query to the matches of ``q``: FTS5 (best match first) when available, LIKE scans otherwise.
+
+    Returns the query and its FTS5 MATCH expression (None for LIKE scans).
+    """
+    match_query = fts_match_query(q) if fts_enabled() else None
+    if match_query:
+        return fts_search(query, match_query, settings.SEARCH_DOMAIN_WEIGHT), match_query
+    like = f"%{q}%"
+    return query.filter((Job.title.ilike(like)) | (Job.description.ilike(like)) | (Job.company.ilike(like))), None
+
+def search_matches(db: Session, q: str):
+    """Ids of the jobs a search matches, from the search index or else FTS/LIKE."""
+    if uses_search_index(q):
+        return search_index.match(q)
+    query, _ = search_query(db.query(Job.id), q)
+    return {job_id for (job_id,) in query}
+
+@app.get("/api/facets")
+def get_facets(
+    request: Request,
     q: Optional[str] = Query(None, description="search query"),
     source: Optional[List[str]] = Query(None, description="lever|greenhouse|... (can be multiple)"),
-    location: Optional[List[str]] = Query(None, description="filter by location (e.g., 'san francisco', 'remote', 'boston') (can be multiple)"),
+    location: Optional[List[str]] = Query(None, description="region code, label or place name (can be multiple)"),
+    job_type: Optional[List[str]] = Query(None, description="research|engineering|clinical|data science|bioinformatics|wet lab|management|operations|sales (can be multiple)"),
     days: Optional[int] = Query(None, description="filter jobs posted in last N days"),
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_sync_db),
 ):
-    query = db.query(Job)
-    if q:
-        like = f"%{q}%"
-        query = query.filter((Job.title.ilike(like)) | (Job.description.ilike(like)) | (Job.company.ilike(like)))
-    
+    """Job counts per source, region, company and job type for the /api/jobs filters.
+
+    Each facet is counted with every filter except its own, so the counts
+    show what selecting another option of that facet would add.
+    """
+    current, early = revalidate(request, current_generation(db))
+    if early:
+        return early
+    facets = facet_index.current or facet_index.build(db)
+
+    base = None
+    if q and q.strip():
+        base = facets.mask_of(search_matches(db, q))
+    if days:
+        from datetime import timedelta
+        cutoff_date = (datetime.utcnow() - timedelta(days=days)).replace(minute=0, second=0, microsecond=0)
+        since = facets.posted_since(cutoff_date)
+        base = since if base is None else base & since
+
+    selections = {}
+    if source:
+        selections["source"] = facets.select("source", source)
+    if location:
+        # Known regions are looked up in the snapshot; other values go through the /api/jobs filter
+        region_codes, other_locations = split_locations(location)
+        selected = facets.select("region", region_codes)
+        if other_locations:
+            matching = filter_jobs(db.query(Job.id), location=other_locations)
+            selected |= facets.mask_of(job_id for (job_id,) in matching)
+        selections["region"] = selected
+    if job_type and any(value.strip() for value in job_type):
+        selections["job_type"] = facets.select("job_type", filter_job_types(job_type))
+
+    return remember(current, json_response(facets.counts(base, selections), headers=current.headers))
+
+# Columns of a /api/jobs row, and those scoring a row without loading the full Job
+LIST_COLUMNS = (Job.id, Job.title, Job.company, Job.location, Job.url, Job.source, Job.posted_at, Job.snippet)
+SCORING_COLUMNS = (Job.features, Job.vocabulary, Job.content_hash)
+
+def job_card(row, score):
+    """JSON-ready /api/jobs item (the fields of JobCard) for a row projected on LIST_COLUMNS."""
+    return {
+        "id": row.id, "title": row.title, "company": row.company, "location": row.location,
+        "url": row.url, "source": row.source, "posted_at": row.posted_at,
+        "snippet": row.snippet or "", "score": score,
+    }
+
+NDJSON = "application/x-ndjson"
+
+def ndjson_rows(rows, scores):
+    """NDJSON lines of job cards, one chunk per STREAM_BATCH_SIZE rows already in memory."""
+    for start in range(0, len(rows), settings.STREAM_BATCH_SIZE):
+        end = start + settings.STREAM_BATCH_SIZE
+        yield b"".join(orjson.dumps(job_card(row, score)) + b"\n" for row, score in zip(rows[start:end], scores[start:end]))
+
+def ndjson_query(query, q=None):
+    """Stream the rows of a LIST_COLUMNS query as NDJSON, scoring each batch for ``q`` as it is read.
+
+    The request's session is closed before a streamed body is sent, so the
+    rows are read through a session of their own.
+    """
+    session = SessionLocal()
+    try:
+        rows = iter(query.with_session(session).yield_per(settings.STREAM_BATCH_SIZE))
+        while True:
+            batch = list(islice(rows, settings.STREAM_BATCH_SIZE))
+            if not batch:
+                break
+            scores = [float(score) for score in score_cache.score(batch, q)] if q else [None] * len(batch)
+            yield from ndjson_rows(batch, scores)
+    finally:
+        session.close()
+
+def ndjson_ranked(ranked):
+    """Stream the (id, score, posted_at) ranking of the search index as NDJSON, loading rows per batch."""
+    session = SessionLocal()
+    try:
+        for start in range(0, len(ranked), settings.STREAM_BATCH_SIZE):
+            batch = ranked[start:start + settings.STREAM_BATCH_SIZE]
+            rows_by_id = {row.id: row for row in session.query(*LIST_COLUMNS).filter(Job.id.in_([job_id for job_id, _, _ in batch]))}
+            batch = [(rows_by_id[job_id], score) for job_id, score, _ in batch if job_id in rows_by_id]
+            yield from ndjson_rows([row for row, _ in batch], [score for _, score in batch])
+    finally:
+        session.close()
+
+# Characters separating the words of a location ("Cambridge, MA", "Remote/US", "Winston-Salem")
+LOCATION_SEPARATORS = ",;/|()-"
+
+def location_words_match(value):
+    """Condition on jobs whose location has every word of ``value`` as a whole word.
+
+    For location filter values that are no known region: 'la' selects
+    "La Jolla" and "Los Angeles, LA" but not every location containing "la".
+    """
+    words = value.lower().translate({ord(separator): " " for separator in LOCATION_SEPARATORS}).split()
+    if not words:
+        return true()
+    padded = func.lower(Job.location)
+    for separator in LOCATION_SEPARATORS:
+        padded = func.replace(padded, separator, " ")
+    padded = " " + padded + " "
+    escaped = (word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") for word in words)
+    return and_(*(padded.like(f"% {word} %", escape="\\") for word in escaped))
+
+def split_locations(location):
+    """Region codes of the known regions among location filter values, and the other values."""
+    region_codes = set()
+    other_locations = []
+    for loc in location:
+        codes = filter_regions(loc)
+        if codes:
+            region_codes.update(codes)
+        else:
+            other_locations.append(loc.strip())
+    return region_codes, other_locations
+
+def filter_jobs(query, source=None, location=None, job_type=None, days=None):
+    """Apply the source, location, job_type and days filters of /api/jobs to a Job query."""
     if source:
         # Handle multiple sources with OR condition
         source_conditions = [Job.source == s for s in source]
         query = query.filter(or_(*source_conditions))
-    
+
     if location:
-        # Handle multiple locations with OR condition
-        all_location_conditions = []
-        
-        for loc in location:
-            location_lower = loc.lower()
-            location_patterns = []
-            
-            # Bay Area variations
-            if any(term in location_lower for term in ['bay area', 'san francisco', 'sf', 'silicon valley', 'palo alto', 'mountain view', 'cupertino', 'sunnyvale']):
-                location_patterns.extend([
-                    '%san francisco%', '%sf%', '%bay area%', '%silicon valley%',
-                    '%palo alto%', '%mountain view%', '%cupertino%', '%sunnyvale%',
-                    '%redwood city%', '%menlo park%', '%fremont%', '%oakland%',
-                    '%berkeley%', '%san jose%', '%santa clara%'
-                ])
-            
-            # Remote variations
-            elif 'remote' in location_lower:
-                location_patterns.extend(['%remote%', '%anywhere%', '%work from home%', '%wfh%'])
-            
-            # Boston area variations  
-            elif any(term in location_lower for term in ['boston', 'cambridge', 'massachusetts']):
-                location_patterns.extend(['%boston%', '%cambridge%', '%massachusetts%', '%ma%'])
-            
-            # NYC area variations
-            elif any(term in location_lower for term in ['new york', 'nyc', 'manhattan', 'brooklyn']):
-                location_patterns.extend(['%new york%', '%nyc%', '%manhattan%', '%brooklyn%', '%ny%'])
-            
-            # Seattle area variations
-            elif any(term in location_lower for term in ['seattle', 'washington']):
-                location_patterns.extend(['%seattle%', '%washington%', '%wa%', '%bellevue%', '%redmond%'])
-            
-            # Los Angeles area variations
-            elif any(term in location_lower for term in ['los angeles', 'la', 'california']):
-                location_patterns.extend(['%los angeles%', '%la%', '%california%', '%ca%', '%santa monica%', '%pasadena%'])
-            
-            # If no predefined patterns, use the search term directly
-            else:
-                location_patterns = [f'%{location_lower}%']
-            
-            # Add this location's conditions to the overall list
-            for pattern in location_patterns:
-                all_location_conditions.append(Job.location.ilike(pattern))
-        
-        # Apply all location filters with OR conditions
-        if all_location_conditions:
-            query = query.filter(or_(*all_location_conditions))
-    
+        # Known regions are an indexed lookup in job_regions; other values match whole words of the location
+        region_codes, other_locations = split_locations(location)
+        location_conditions = [location_words_match(loc) for loc in other_locations]
+        if region_codes:
+            in_regions = select(JobRegion.job_id).where(JobRegion.region.in_(region_codes))
+            location_conditions.append(Job.id.in_(in_regions))
+        query = query.filter(or_(*location_conditions))
+
+    if job_type and any(value.strip() for value in job_type):
+        # Job types are classified at ingestion, so this is an indexed lookup in job_types; unknown ones match nothing
+        of_types = select(JobType.job_id).where(JobType.job_type.in_(filter_job_types(job_type)))
+        query = query.filter(Job.id.in_(of_types))
+
     if days:
         from datetime import timedelta
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        # Whole hours keep the result (and its ETag) stable between ingestion runs
+        cutoff_date = (datetime.utcnow() - timedelta(days=days)).replace(minute=0, second=0, microsecond=0)
         query = query.filter(Job.posted_at >= cutoff_date)
-    
-    # Order by relevance score first, then by most recent date
-    # Recalculate scores based on search query if provided
-    jobs_with_scores = []
-    for job in query.order_by(Job.posted_at.desc()).limit(limit * 2).all():  # Get more jobs to re-score
-        job_dict = {
-            "title": job.title,
-            "description": job.description,
-            "company": job.company,
-            "location": job.location,
-            "url": job.url,
-            "source": job.source,
-            "posted_at": job.posted_at
-        }
-        
-        # Recalculate score based on search query, or use None if no search query
-        if q and q.strip():
-            new_score = score_job(job_dict, q)
+    return query
+
+@app.get("/api/jobs", response_model=List[JobCard])
+def list_jobs(
+    request: Request,
+    q: Optional[str] = Query(None, description="search query"),
+    source: Optional[List[str]] = Query(None, description="lever|greenhouse|... (can be multiple)"),
+    location: Optional[List[str]] = Query(None, description="filter by location (e.g., 'san francisco', 'remote', 'boston') (can be multiple)"),
+    job_type: Optional[List[str]] = Query(None, description="research|engineering|clinical|data science|bioinformatics|wet lab|management|operations|sales (can be multiple)"),
+    days: Optional[int] = Query(None, description="filter jobs posted in last N days"),
+    limit: int = Query(100, ge=1, description=f"page size, capped at {settings.MAX_PAGE_SIZE}"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    format: Optional[str] = Query(None, description="ndjson streams one job card per line (same as Accept: application/x-ndjson)"),
+    db: Session = Depends(get_sync_db),
+):
+    """One page of job cards; X-Total-Count (first page) and X-Next-Cursor headers drive pagination.
+
+    NDJSON pages are streamed as their rows are read and scored, and may be
+    larger (up to MAX_STREAM_PAGE_SIZE).
+    """
+    stream = wants_ndjson(request)
+    limit = min(limit, settings.MAX_STREAM_PAGE_SIZE if stream else settings.MAX_PAGE_SIZE)
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    current, early = revalidate(request, current_generation(db))
+    if early:
+        return early
+
+    query = db.query(Job)
+    # Searches use the in-process index or the FTS5 index when available, LIKE scans otherwise
+    use_index = uses_search_index(q)
+    match_query = None
+    if q and q.strip() and not use_index:  # The index matches the query once the other filters are applied
+        query, match_query = search_query(query, q)
+
+    query = filter_jobs(query, source, location, job_type, days)
+
+    # Fetch one row more than the page to know whether another page follows; NDJSON
+    # pages only look up the keys of the next cursor here and stream their rows later
+    total = None
+    offset = (after.offset or 0) if after else 0
+    next_cursor = None
+    if use_index:
+        # Rank every match, not just the most recent rows; filters narrow the allowed ids
+        filtered = source or location or job_type or days
+        allowed = {job_id for (job_id,) in query.with_entities(Job.id)} if filtered else None
+        after_key = sort_key(after.score, after.posted_at, after.id) if after else None
+        ranked, total = search_index.search(q, limit + 1, allowed, after_key)
+        if len(ranked) > limit:
+            job_id, score, posted_at = ranked[limit - 1]
+            next_cursor = Cursor(score=score, posted_at=posted_at, id=job_id)
+        if stream:
+            body = ndjson_ranked(ranked[:limit])
         else:
-            new_score = None  # No search query, so no relevance score
-        
-        jobs_with_scores.append({
-            "job": job,
-            "score": new_score
-        })
-    
-    # Sort by new score (None values go to end) and take the requested limit
-    if q and q.strip():
-        jobs_with_scores.sort(key=lambda x: (x["score"] or 0, x["job"].posted_at), reverse=True)
+            page_ids = [job_id for job_id, _, _ in ranked]
+            rows_by_id = {row.id: row for row in db.query(*LIST_COLUMNS).filter(Job.id.in_(page_ids))}
+            ranked = [item for item in ranked if item[0] in rows_by_id]
+            candidates = [rows_by_id[job_id] for job_id, _, _ in ranked]
+            scores = [score for _, score, _ in ranked]
+    elif match_query:
+        # Already ranked by BM25 over every match; pages are offsets into that order
+        if after is None:
+            total = query.count()
+        if stream:
+            if query.with_entities(Job.id).offset(offset + limit).limit(1).first() is not None:
+                next_cursor = Cursor(offset=offset + limit)
+            body = ndjson_query(query.with_entities(*LIST_COLUMNS, *SCORING_COLUMNS).offset(offset).limit(limit), q)
+        else:
+            candidates = query.with_entities(*LIST_COLUMNS, *SCORING_COLUMNS).offset(offset).limit(limit + 1).all()
+            scores = [float(score) for score in score_cache.score(candidates, q)]
+            if len(candidates) > limit:
+                next_cursor = Cursor(offset=offset + limit)
+    elif q and q.strip():
+        # Re-score a window of the most recent matches and page through it
+        if after is None:
+            total = query.count()
+        window = query.with_entities(*LIST_COLUMNS, *SCORING_COLUMNS).order_by(Job.posted_at.desc()).limit((offset + limit) * 2 + 1).all()
+        window_scores = [float(score) for score in score_cache.score(window, q)]
+        ranked = sorted(zip(window, window_scores), key=lambda item: sort_key(item[1], item[0].posted_at, item[0].id), reverse=True)
+        page = ranked[offset:offset + limit + 1]
+        candidates = [job for job, _ in page]
+        scores = [score for _, score in page]
+        if len(candidates) > limit:
+            next_cursor = Cursor(offset=offset + limit)
+        if stream:
+            body = ndjson_rows(candidates[:limit], scores)
     else:
-        # No search query, just sort by date
-        jobs_with_scores.sort(key=lambda x: x["job"].posted_at, reverse=True)
-    
-    rows = [item["job"] for item in jobs_with_scores[:limit]]
-    return [JobOut(
-        id=r.id, title=r.title, company=r.company, location=r.location, url=r.url,
-        source=r.source, posted_at=r.posted_at, description=r.description, 
-        score=next(item["score"] for item in jobs_with_scores if item["job"].id == r.id)
-    ) for r in rows]
+        # No search query: newest first, keyset pagination on (posted_at, id)
+        if after is None:
+            total = query.count()
+        else:
+            query = query.filter(after_cursor(Job, after))
+        query = query.order_by(Job.posted_at.desc().nulls_last(), Job.id.desc())
+        if stream:
+            last = query.with_entities(Job.id, Job.posted_at).offset(limit - 1).limit(2).all()
+            if len(last) > 1:
+                next_cursor = Cursor(posted_at=last[0].posted_at, id=last[0].id)
+            body = ndjson_query(query.with_entities(*LIST_COLUMNS).limit(limit))
+        else:
+            candidates = query.with_entities(*LIST_COLUMNS).limit(limit + 1).all()
+            scores = [None] * len(candidates)  # No search query, so no relevance score
+            if len(candidates) > limit:
+                last = candidates[limit - 1]
+                next_cursor = Cursor(posted_at=last.posted_at, id=last.id)
 
-@app.post("/api/jobs", response_model=JobOut)
-def upsert_job(job: JobIn, db: Session = Depends(get_db)):
+    headers = dict(current.headers)
+    headers["Vary"] = "Accept"
+    if total is not None:
+        headers["X-Total-Count"] = str(total)
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = encode_cursor(next_cursor)
+    if stream:
+        # Streamed bodies are not kept in the response cache; their ETag still answers 304s
+        return StreamingResponse(body, media_type=NDJSON, headers=headers)
+
+    # Rows come straight from the database, so they are serialized without JobOut validation
+    content = [job_card(row, score) for row, score in zip(candidates[:limit], scores)]
+    return remember(current, json_response(content, headers=headers))
+
+@app.get("/api/jobs/{job_id}", response_model=JobOut)
+async def get_job(job_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """Full job, including the description that list views only show a snippet of."""
+    current, early = revalidate(request, await read_generation(db))
+    if early:
+        return early
+    row = await db.get(Job, job_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    job = JobOut(
+        id=row.id, title=row.title, company=row.company, location=row.location, url=row.url,
+        source=row.source, posted_at=row.posted_at, description=row.description, score=row.score,
+    )
+    return remember(current, json_response(job.model_dump(), headers=current.headers))
+
+@app.get("/api/export")
+def export_jobs(
+    request: Request,
+    q: Optional[str] = Query(None, description="search query"),
+    source: Optional[List[str]] = Query(None, description="lever|greenhouse|... (can be multiple)"),
+    location: Optional[List[str]] = Query(None, description="filter by location (e.g., 'san francisco', 'remote', 'boston') (can be multiple)"),
+    job_type: Optional[List[str]] = Query(None, description="research|engineering|clinical|data science|bioinformatics|wet lab|management|operations|sales (can be multiple)"),
+    days: Optional[int] = Query(None, description="filter jobs posted in last N days"),
+    format: str = Query("csv", description="csv|ndjson|parquet"),
+    db: Session = Depends(get_sync_db),
+):
+    """Stream every job matching the /api/jobs filters, with full descriptions, as CSV, NDJSON or Parquet.
+
+    Rows are neither scored nor paginated; searches keep only the matching
+    jobs, in id order (best BM25 match first on the FTS backend).
+    """
+    fmt = format.strip().lower()
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format '{format}', expected csv, ndjson or parquet")
+    if fmt == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export needs the pyarrow package")
+
+    query = filter_jobs(db.query(Job), source, location, job_type, days)
+    keep = None
+    if uses_search_index(q):
+        current_generation(db)  # Catches this worker's index up with the committed data
+        keep = search_matches(db, q)  # Other rows are dropped from the streamed batches
+    elif q and q.strip():
+        query, _ = search_query(query, q)
+    query = query.with_entities(*EXPORT_COLUMNS).order_by(Job.id)
+
+    filename = f"jobs-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    chunks = export_chunks(query, fmt, keep)
+    if MEDIA_TYPES[fmt].split(";")[0] in COMPRESSIBLE_TYPES:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+        if encoding:
+            # Compressed with the chunks on the export thread pool rather than by CompressionMiddleware on the event loop
+            chunks = compress_chunks(chunks, Compressor(encoding, settings.GZIP_LEVEL, settings.BROTLI_QUALITY))
+            headers["Content-Encoding"] = encoding
+    return StreamingResponse(stream_export(chunks), media_type=MEDIA_TYPES[fmt], headers=headers)
+
+def save_job(db: Session, job: JobIn) -> Job:
+    """Insert or update the job posted to /api/jobs and commit it."""
     existing = db.query(Job).filter(Job.url == job.url).first()
     if existing:
         for field, value in job.model_dump(exclude_unset=True).items():
             setattr(existing, field, value)
+        existing.features = job_features(existing)
+        existing.vocabulary = job_vocabulary(existing)
+        existing.snippet = job_snippet(existing.description)
+        existing.last_seen_at = datetime.utcnow()
+        if existing.content_hash != content_hash(existing):
+            score_cache.invalidate(existing.content_hash)
+            existing.content_hash = content_hash(existing)
         if not existing.score:
             existing.score = 0.0
+        assign_regions(existing)
+        assign_job_types(existing)
         db.add(existing)
         db.commit()
         db.refresh(existing)
-        return JobOut(**existing.__dict__)
+        return existing
     row = Job(
         title=job.title, company=job.company, location=job.location, url=job.url,
         source=job.source, posted_at=job.posted_at or datetime.utcnow(),
-        description=job.description, score=job.score or 0.0
+        description=job.description, score=job.score or 0.0,
+        features=job_features(job.model_dump()), vocabulary=job_vocabulary(job.model_dump()),
+        content_hash=content_hash(job.model_dump()), snippet=job_snippet(job.description),
+        last_seen_at=datetime.utcnow()
     )
+    assign_regions(row)
+    assign_job_types(row)
     db.add(row)
     db.commit()
     db.refresh(row)
+    return row
+
+@app.post("/api/jobs", response_model=JobOut)
+async def upsert_job(job: JobIn, db: AsyncSession = Depends(get_db)):
+    row = await db.run_sync(save_job, job)
+    await run_in_threadpool(publish_changes, [row])
     return JobOut(**row.__dict__)
 
 @app.post("/api/ingest/{source}/{company}")
-async def ingest_source_company(source: str, company: str, db: Session = Depends(get_db)):
-    """Pull jobs for one company from a supported source."""
-    if source == "lever":
-        jobs = await lever_scraper.fetch_company_jobs(company)
-    elif source == "greenhouse":
-        jobs = await greenhouse_scraper.fetch_company_jobs(company)
-    else:
-        return {"status": "unsupported source", "source": source}
+async def ingest_source_company(source: str, company: str, db: AsyncSession = Depends(get_db)):
+    """Pull jobs for one company from a supported source.
 
-    saved = 0
-    for j in jobs:
-        j["score"] = score_job(j)  # Use default scoring for manual ingestion
-        existing = db.query(Job).filter(Job.url == j["url"]).first()
-        if existing:
-            # update if needed
-            existing.title = j["title"]
-            existing.company = j["company"]
-            existing.location = j.get("location", "")
-            existing.description = j.get("description", "")
-            existing.posted_at = j.get("posted_at") or existing.posted_at
-            existing.score = j.get("score", existing.score)
-            db.add(existing)
+    Answers 409 while an ingestion run holds the ingestion lease: a staged
+    run would drop these jobs again when it swaps its corpus in.
+    """
+    if source not in ("lever", "greenhouse"):
+        return {"status": "unsupported source", "source": source}
+    owner = uuid.uuid4().hex
+    if not await db.run_sync(acquire_ingestion_lease, owner):
+        raise HTTPException(status_code=409, detail="An ingestion run is in progress, try again later")
+    try:
+        if source == "lever":
+            jobs = await lever_scraper.fetch_company_jobs(company)
         else:
-            row = Job(
-                title=j["title"], company=j["company"], location=j.get("location",""),
-                url=j["url"], source=j["source"], posted_at=j.get("posted_at"),
-                description=j.get("description",""), score=j.get("score", 0.0)
-            )
-            db.add(row); saved += 1
-    db.commit()
-    return {"status": "ok", "fetched": len(jobs), "inserted": saved}
+            jobs = await greenhouse_scraper.fetch_company_jobs(company)
+
+        # Scoring runs in the threadpool and the writes on the async session, so the event loop keeps serving
+        annotated = await run_in_threadpool(annotate_jobs, jobs)  # Features + default scoring for manual ingestion
+        counts = await db.run_sync(bulk_upsert_jobs, annotated)
+        await run_in_threadpool(publish_changes, None, datetime.utcnow())
+    finally:
+        await db.run_sync(release_ingestion_lease, owner)
+    return {"status": "ok", "fetched": len(jobs), **counts}
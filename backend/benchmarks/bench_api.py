@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark for GET /api/jobs latency against a temporary SQLite database.
+
+Pages stay within the production limits (--limit up to MAX_PAGE_SIZE,
+--stream-limit up to MAX_STREAM_PAGE_SIZE), and the response cache is
+cleared before every request so each one is built and serialized. Also
+compares time to first byte and peak memory of a page served as JSON and
+streamed as NDJSON, and of a --stream-limit page streamed as NDJSON.
+
+Usage (from backend/):
+    python benchmarks/bench_api.py [--jobs 2000] [--limit 200] [--repeat 5] [--stream-limit 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Point the app at a throwaway database before it creates its engine
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+import logging
+
+from fastapi.testclient import TestClient
+
+from corpus import make_jobs
+from db import SessionLocal, upsert_job, Job
+from models import JobOut
+from settings import settings
+from util import annotate_jobs
+import app as api
+
+REQUESTS = [
+    {},
+    {"q": "bioinformatics"},
+    {"q": "machine learning", "location": "remote"},
+    {"source": "greenhouse", "job_type": "research"},
+]
+
+
+def legacy_response(rows, scores) -> bytes:
+    """Previous response assembly: full rows, O(n^2) score lookup, JobOut validation, stdlib JSON."""
+    jobs_with_scores = [{"job": job, "score": score} for job, score in zip(rows, scores)]
+    items = [JobOut(
+        id=r.id, title=r.title, company=r.company, location=r.location, url=r.url,
+        source=r.source, posted_at=r.posted_at, description=r.description,
+        score=next(item["score"] for item in jobs_with_scores if item["job"].id == r.id)
+    ) for r in rows]
+    return json.dumps([item.model_dump(mode="json") for item in items]).encode()
+
+
+def lean_response(rows, scores) -> bytes:
+    return api.json_response([api.job_card(row, score) for row, score in zip(rows, scores)]).body
+
+
+async def timed_request(query_string: str):
+    """Run one GET /api/jobs through the ASGI app: (seconds to the first body bytes, total seconds, body bytes)."""
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http", "path": "/api/jobs",
+        "raw_path": b"/api/jobs", "query_string": query_string.encode(), "headers": [], "root_path": "",
+        "server": ("bench", 80), "client": ("bench", 1234),
+    }
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if requested:  # Streaming responses listen for a disconnect until they are done
+            await finished.wait()
+            return {"type": "http.disconnect"}
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal first_byte, size
+        if message["type"] == "http.response.body" and message.get("body"):
+            first_byte = first_byte or time.perf_counter() - start
+            size += len(message["body"])
+
+    await api.app(scope, receive, send)
+    finished.set()
+    return first_byte, time.perf_counter() - start, size
+
+
+def stream_comparison(page_limit: int, stream_limit: int):
+    for params in ({}, {"q": "bioinformatics"}):
+        for fmt, limit in (("json", page_limit), ("ndjson", page_limit), ("ndjson", stream_limit)):
+            api.response_cache.clear()
+            query_string = urlencode({**params, "limit": limit, "format": fmt})
+            tracemalloc.start()
+            first_byte, total, size = asyncio.run(timed_request(query_string))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{fmt:>6} {params or ''} limit={limit}: first byte {first_byte * 1e3:.1f} ms, "
+                  f"total {total * 1e3:.1f} ms, peak {peak / 2**20:.1f} MiB, {size / 1024:.0f} KiB")
+
+
+def uncached_get(client, params):
+    """GET /api/jobs built from scratch rather than answered by the response cache."""
+    api.response_cache.clear()
+    return client.get("/api/jobs", params=params)
+
+
+def best_of(repeat, fn):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=settings.MAX_PAGE_SIZE)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--stream-limit", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    if args.limit > settings.MAX_PAGE_SIZE:
+        parser.error(f"--limit is capped at MAX_PAGE_SIZE ({settings.MAX_PAGE_SIZE})")
+    if args.stream_limit > settings.MAX_STREAM_PAGE_SIZE:
+        parser.error(f"--stream-limit is capped at MAX_STREAM_PAGE_SIZE ({settings.MAX_STREAM_PAGE_SIZE})")
+
+    api.init_db()
+    session = SessionLocal()
+    for job in annotate_jobs(make_jobs(args.jobs)):
+        upsert_job(session, job)
+
+    # Response assembly and serialization alone, on the same page of rows
+    rows = session.query(Job).order_by(Job.posted_at.desc()).limit(args.limit).all()
+    projected = session.query(*api.LIST_COLUMNS).order_by(Job.posted_at.desc()).limit(args.limit).all()
+    scores = [float(row.score) for row in rows]
+    legacy = best_of(args.repeat, lambda: legacy_response(rows, scores))
+    lean = best_of(args.repeat, lambda: lean_response(projected, scores))
+    print(f"assembly + JSON, {len(rows)} rows: legacy {legacy * 1e3:.1f} ms, lean {lean * 1e3:.1f} ms "
+          f"({legacy / lean:.1f}x)")
+    session.close()
+
+    # End-to-end requests through the ASGI app
+    with TestClient(api.app) as client:
+        for params in REQUESTS:
+            params = {**params, "limit": args.limit}
+            response = uncached_get(client, params)
+            elapsed = best_of(args.repeat, lambda: uncached_get(client, params))
+            print(f"GET /api/jobs {params}: {elapsed * 1e3:.1f} ms, {len(response.json())} jobs, "
+                  f"{len(response.content) / 1024:.0f} KiB")
+
+        # A page built in memory as JSON vs streamed as NDJSON, and a larger streamed page
+        stream_comparison(args.limit, args.stream_limit)
+
+
+if __name__ == "__main__":
+    main()
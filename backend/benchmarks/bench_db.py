@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark for read latency while an ingestion run is writing, rollback journal vs WAL.
+
+A writer process upserts jobs one commit at a time, as the scheduler does,
+while reader threads run the queries behind /api/jobs and /api/jobs/{id}.
+Each journal configuration gets a fresh temporary SQLite database.
+
+Usage (from backend/):
+    python benchmarks/bench_db.py [--jobs 1000] [--writes 500] [--readers 4]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from corpus import make_jobs
+from db import Base, Job, make_engine, upsert_job
+from settings import settings
+
+# (label, journal_mode, synchronous); the first is SQLite's default
+CONFIGS = [
+    ("rollback journal", "DELETE", "FULL"),
+    ("WAL", "WAL", "NORMAL"),
+]
+
+LIST_COLUMNS = (Job.id, Job.title, Job.company, Job.location, Job.url, Job.source, Job.posted_at, Job.snippet)
+
+
+def open_sessions(url, journal_mode, synchronous):
+    settings.SQLITE_JOURNAL_MODE = journal_mode
+    settings.SQLITE_SYNCHRONOUS = synchronous
+    engine = make_engine(url)
+    return engine, sessionmaker(bind=engine, autoflush=False)
+
+
+def write_jobs(url, journal_mode, synchronous, jobs):
+    """Writer process: one upsert and commit per job."""
+    logging.disable(logging.INFO)
+    engine, Session = open_sessions(url, journal_mode, synchronous)
+    session = Session()
+    for job in jobs:
+        upsert_job(session, job)
+    session.close()
+    engine.dispose()
+
+
+def read_until(Session, done, max_id, latencies, errors, seed):
+    """Reader thread: a newest-first page, a filtered count or a job by id, until ``done`` is set."""
+    rnd = random.Random(seed)
+    session = Session()
+    while not done.is_set():
+        start = time.perf_counter()
+        try:
+            kind = rnd.random()
+            if kind < 0.5:
+                session.query(*LIST_COLUMNS).order_by(Job.posted_at.desc(), Job.id.desc()).limit(50).all()
+            elif kind < 0.75:
+                session.query(Job).filter(Job.source == "greenhouse").count()
+            else:
+                session.get(Job, rnd.randint(1, max_id))
+            session.rollback()  # End the read transaction, as a request does
+        except OperationalError:
+            session.rollback()
+            errors.append(1)
+            continue
+        latencies.append(time.perf_counter() - start)
+    session.close()
+
+
+def run(label, journal_mode, synchronous, seed_jobs, new_jobs, readers):
+    url = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    engine, Session = open_sessions(url, journal_mode, synchronous)
+    Base.metadata.create_all(bind=engine)
+    session = Session()
+    for job in seed_jobs:
+        upsert_job(session, job)
+    session.close()
+
+    writer = multiprocessing.Process(target=write_jobs, args=(url, journal_mode, synchronous, new_jobs))
+    done = threading.Event()
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(target=read_until, args=(Session, done, len(seed_jobs), latencies, errors, i))
+        for i in range(readers)
+    ]
+    start = time.perf_counter()
+    writer.start()
+    for thread in threads:
+        thread.start()
+    writer.join()
+    write_time = time.perf_counter() - start
+    done.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    ms = np.array(latencies) * 1e3
+    print(f"{label:>16}: {len(new_jobs)} writes in {write_time:.1f} s | {len(ms)} reads, "
+          f"p50 {np.percentile(ms, 50):.2f} ms, p95 {np.percentile(ms, 95):.2f} ms, "
+          f"p99 {np.percentile(ms, 99):.2f} ms, max {ms.max():.1f} ms, {len(errors)} 'database is locked'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=1000, help="jobs in the database before the run")
+    parser.add_argument("--writes", type=int, default=500, help="jobs upserted by the writer during the run")
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    jobs = make_jobs(args.jobs + args.writes)
+    for label, journal_mode, synchronous in CONFIGS:
+        run(label, journal_mode, synchronous, jobs[:args.jobs], jobs[args.jobs:], args.readers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark for connections opened by one ingestion run: a client per company vs the shared client.
+
+Local keep-alive servers stand in for boards-api.greenhouse.io and
+api.lever.co, and count the TCP connections they accept; against the real
+hosts each of them also costs a DNS lookup and a TLS handshake.
+
+Then the greenhouse stand-in answers 429 (Retry-After: 1) above
+--allowed-rate requests per second, and a run without pacing is compared
+with the per-host rate limiter configured --configured-rate requests per
+second, more than the host accepts.
+
+Usage (from backend/):
+    python benchmarks/bench_http.py [--companies 120] [--delay 0.05] [--allowed-rate 20] [--configured-rate 50]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+
+import httpx
+
+import http_client
+import ingestor
+from settings import settings
+
+HOSTS = ("boards-api.greenhouse.io", "api.lever.co")
+
+original_make_transport = http_client.make_transport
+
+
+class JobBoardHandler(BaseHTTPRequestHandler):
+    """Answers greenhouse and lever job-list requests with one job; counts the connections it is given."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        if self.over_rate():
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        time.sleep(self.server.delay)
+        url = f"https://example.com{self.path}"
+        job = {"title": "Scientist", "absolute_url": url, "hostedUrl": url, "updated_at": "2025-07-01T00:00:00Z",
+               "location": {"name": "Boston, MA"}, "content": "Genomics"}
+        body = json.dumps({"jobs": [job]} if "/boards/" in self.path else [job]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def over_rate(self):
+        """Whether the server already answered ``allowed_rate`` requests within the last second."""
+        if not self.server.allowed_rate:
+            return False
+        with self.server.lock:
+            now = time.monotonic()
+            while self.server.answered and self.server.answered[0] < now - 1:
+                self.server.answered.popleft()
+            if len(self.server.answered) >= self.server.allowed_rate:
+                self.server.throttled += 1
+                return True
+            self.server.answered.append(now)
+            return False
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalHosts(httpx.AsyncBaseTransport):
+    """Sends the requests for HOSTS to the local server standing in for each."""
+
+    def __init__(self, ports):
+        self.ports = ports
+        self.transport = original_make_transport()
+
+    async def handle_async_request(self, request):
+        if request.url.host in self.ports:  # A retried request was already sent here
+            request.url = request.url.copy_with(scheme="http", host="127.0.0.1", port=self.ports[request.url.host])
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def start_servers(delay):
+    servers = {}
+    for host in HOSTS:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), JobBoardHandler)
+        server.daemon_threads = True
+        server.lock, server.connections, server.delay = threading.Lock(), 0, delay
+        server.allowed_rate, server.answered, server.throttled = 0, deque(), 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers[host] = server
+    return servers
+
+
+async def client_per_company(companies):
+    """Previous behaviour: every scraper call opens and closes a client of its own."""
+    semaphore = asyncio.Semaphore(settings.INGESTION_CONCURRENCY)
+    return await asyncio.gather(*(ingestor.fetch_company(entry, semaphore, None) for entry in companies))
+
+
+def run(label, driver, companies, servers):
+    for server in servers.values():
+        server.connections = server.throttled = 0
+    start = time.perf_counter()
+    results = asyncio.run(driver(companies))
+    elapsed = time.perf_counter() - start
+    fetched = sum(len(jobs) for jobs in results if jobs)
+    per_host = ", ".join(f"{host} {server.connections}" for host, server in servers.items())
+    print(f"{label:>18}: {len(companies)} companies, {fetched} jobs in {elapsed:.2f} s | "
+          f"{sum(server.connections for server in servers.values())} connections ({per_host}), "
+          f"{sum(server.throttled for server in servers.values())} answered 429")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--companies", type=int, default=120)
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds the servers take per response")
+    parser.add_argument("--allowed-rate", type=int, default=20, help="requests/s the greenhouse stand-in accepts")
+    parser.add_argument("--configured-rate", type=float, default=50.0, help="requests/s the rate limiter starts at")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    servers = start_servers(args.delay)
+    ports = {host: server.server_address[1] for host, server in servers.items()}
+    http_client.make_transport = lambda: LocalHosts(ports)
+    companies = [{"source": ("greenhouse", "lever")[i % 2], "company": f"company-{i}", "token": f"company-{i}"}
+                 for i in range(args.companies)]
+    print(f"HTTP/2: {'on' if http_client.http2_enabled() else 'off (h2 not installed)'}, "
+          f"{settings.INGESTION_CONCURRENCY} companies at a time")
+    settings.RATE_LIMITS = {host: float("inf") for host in HOSTS}  # Connections only, no pacing
+    run("client per company", client_per_company, companies, servers)
+    run("shared client", ingestor.fetch_all_companies, companies, servers)
+
+    greenhouse = [entry for entry in companies if entry["source"] == "greenhouse"]
+    servers[HOSTS[0]].allowed_rate = args.allowed_rate
+    print(f"{HOSTS[0]} accepting {args.allowed_rate} requests/s:")
+    retries = settings.RATE_LIMIT_MAX_RETRIES
+    settings.RATE_LIMIT_MAX_RETRIES = 0
+    run("no pacing", ingestor.fetch_all_companies, greenhouse, servers)
+    settings.RATE_LIMIT_MAX_RETRIES = retries
+    settings.RATE_LIMITS = {HOSTS[0]: args.configured_rate}
+    run("per-host limiter", ingestor.fetch_all_companies, greenhouse, servers)
+
+
+if __name__ == "__main__":
+    main()
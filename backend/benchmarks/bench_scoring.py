@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Benchmark for util.score_job / util.score_jobs against the previous per-keyword regex implementation.
+
+Usage (from backend/):
+    python benchmarks/bench_scoring.py [--jobs 300] [--repeat 3]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_jobs
+from util import score_job, score_jobs, job_features, job_vocabulary
+
+QUERIES = [None, "bioinformatics", "data scientist", "machine learning", "single-cell genomics"]
+
+
+def legacy_score_job(job: Dict, search_query: str = None) -> float:
+    """Previous implementation: one re.search per keyword per call (kept verbatim for comparison)."""
+    title = (job.get('title') or '').lower()
+    description = (job.get('description') or '').lower()
+    
+    score = 0
+    
+    # If there's a search query, prioritize exact matches
+    if search_query and search_query.strip():
+        query_terms = [term.strip().lower() for term in search_query.split() if term.strip()]
+        
+        for term in query_terms:
+            # Exact phrase match in title gets highest boost
+            if term in title:
+                if len(term) > 3:  # Avoid boosting short common words
+                    score += 15
+            # Exact phrase match in description gets medium boost  
+            elif term in description:
+                if len(term) > 3:
+                    score += 8
+            
+            # Partial word matches (for terms like "bioinformatics" matching "bioinformatician")
+            title_words = title.split()
+            desc_words = description.split()
+            
+            for word in title_words:
+                if term in word and len(term) > 3:
+                    score += 10
+            
+            for word in desc_words:
+                if term in word and len(term) > 3:
+                    score += 5
+    
+    # High-priority bioinformatics keywords (higher weight)
+    primary_keywords = [
+        'bioinformatics', 'bioinformatician', 'computational biology', 'computational biologist',
+        'genomics', 'transcriptomics', 'proteomics', 'metabolomics',
+        'ngs', 'rna-seq', 'chip-seq', 'atac-seq', 'single cell', 'single-cell',
+        'variant calling', 'gwas', 'metagenomics', 'phylogenetics',
+        'multi-omic', 'multiomics', 'epigenomics'
+    ]
+    
+    # Data science specific keywords
+    data_science_keywords = [
+        'data scientist', 'data science', 'machine learning engineer', 'ml engineer',
+        'data analyst', 'data engineer', 'analytics', 'statistician',
+        'artificial intelligence', 'ai engineer', 'deep learning', 'neural networks'
+    ]
+    
+    # Medium-priority technical keywords
+    technical_keywords = [
+        'python', 'r programming', 'perl', 'bash', 'linux',
+        'machine learning', 'deep learning', 'statistics', 'statistical',
+        'data science', 'algorithm', 'pipeline', 'workflow',
+        'docker', 'cloud computing', 'aws', 'gcp', 'azure',
+        'sql', 'pandas', 'numpy', 'scikit-learn', 'tensorflow', 'pytorch'
+    ]
+    
+    # Lower-priority general keywords
+    general_keywords = [
+        'analysis', 'modeling', 'visualization', 'database',
+        'api', 'git', 'software engineering', 'automation'
+    ]
+    
+    # Choose keyword set based on search query context
+    if search_query:
+        query_lower = search_query.lower()
+        if any(term in query_lower for term in ['data scien', 'data analy', 'ml engineer', 'machine learning']):
+            # Boost data science keywords for data science searches
+            primary_keywords = data_science_keywords + primary_keywords
+        elif any(term in query_lower for term in ['bioinformatics', 'computational biology', 'genomics']):
+            # Keep bioinformatics keywords as primary for bio searches
+            pass
+    
+    # Score title matches (higher weight for title)
+    for kw in primary_keywords:
+        # Use word boundaries but handle hyphenated terms
+        pattern = r'\b' + re.escape(kw).replace(r'\-', r'[-\s]?') + r'\b'
+        if re.search(pattern, title):
+            score += 10  # High weight for primary keywords in title
+        elif re.search(pattern, description):
+            score += 5   # Medium weight for primary keywords in description
+    
+    for kw in technical_keywords:
+        pattern = r'\b' + re.escape(kw).replace(r'\-', r'[-\s]?') + r'\b'
+        if re.search(pattern, title):
+            score += 3   # Medium weight for technical keywords in title
+        elif re.search(pattern, description):
+            score += 1   # Low weight for technical keywords in description
+    
+    for kw in general_keywords:
+        pattern = r'\b' + re.escape(kw).replace(r'\-', r'[-\s]?') + r'\b'
+        if re.search(pattern, title):
+            score += 1   # Low weight for general keywords in title
+        elif re.search(pattern, description):
+            score += 0.5 # Very low weight for general keywords in description
+    
+    # Bonus for multiple relevant indicators
+    relevant_indicators = sum(1 for kw in primary_keywords[:12] 
+                            if re.search(r'\b' + re.escape(kw).replace(r'\-', r'[-\s]?') + r'\b', 
+                                       title + " " + description))
+    if relevant_indicators >= 3:
+        score += 5  # Bonus for jobs with multiple relevant indicators
+    
+    # Penalty for wet-lab focused roles (only for bioinformatics searches)
+    if not search_query or 'bioinformatics' in search_query.lower():
+        wet_lab_keywords = [
+            'wet lab', 'wetlab', 'laboratory technician', 'bench scientist', 'assay development',
+            'cell culture', 'molecular cloning', 'pcr', 'western blot',
+            'immunohistochemistry', 'flow cytometry', 'microscopy', 'lab technician'
+        ]
+        
+        wet_lab_mentions = sum(1 for kw in wet_lab_keywords 
+                              if re.search(r'\b' + re.escape(kw).replace(r'\-', r'[-\s]?') + r'\b', 
+                                         title + " " + description))
+        
+        # Apply penalty if wet-lab keywords are prominent but bioinformatics is not in title
+        if wet_lab_mentions >= 2 and not any(re.search(r'\b' + re.escape(kw).replace(r'\-', r'[-\s]?') + r'\b', title) 
+                                             for kw in primary_keywords[:4]):  # Only check core bioinformatics terms
+            score = score * 0.3  # Reduce score significantly for wet-lab heavy roles
+    
+    return float(max(0, min(100, score * 2)))  # Scale to 0-100 range
+
+
+def time_scorer(scorer, jobs, queries, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for q in queries:
+            for job in jobs:
+                scorer(job, q)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    jobs = make_jobs(args.jobs)
+
+    mismatches = sum(
+        1 for q in QUERIES for job in jobs if legacy_score_job(job, q) != score_job(job, q)
+    )
+    mismatches += sum(
+        1 for q in QUERIES for job, score in zip(jobs, score_jobs(jobs, q)) if score != score_job(job, q)
+    )
+    rows = [{**job, "features": job_features(job), "vocabulary": job_vocabulary(job)} for job in jobs]
+    mismatches += sum(
+        1 for q in QUERIES for job, score in zip(jobs, score_jobs(rows, q)) if score != score_job(job, q)
+    )
+    print(f"Checked {len(jobs) * len(QUERIES)} scores against legacy, batch and stored-feature scoring: {mismatches} mismatches")
+
+    calls = len(jobs) * len(QUERIES)
+    legacy = time_scorer(legacy_score_job, jobs, QUERIES, args.repeat)
+    current = time_scorer(score_job, jobs, QUERIES, args.repeat)
+    print(f"legacy score_job:   {legacy:.3f}s ({legacy / calls * 1e6:.1f} us/call)")
+    print(f"compiled score_job: {current:.3f}s ({current / calls * 1e6:.1f} us/call)")
+    print(f"speedup: {legacy / current:.1f}x")
+
+    batch = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for q in QUERIES:
+            score_jobs(jobs, q)
+        batch = min(batch, time.perf_counter() - start)
+    print(f"batch score_jobs:   {batch:.3f}s ({batch / calls * 1e6:.1f} us/job)")
+
+    # Query time with features and vocabulary persisted at ingestion (no text is scanned)
+    stored = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for q in QUERIES:
+            score_jobs(rows, q)
+        stored = min(stored, time.perf_counter() - start)
+    print(f"stored features:    {stored:.3f}s ({stored / calls * 1e6:.1f} us/job)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark for writing an ingestion run: upsert_job per job vs bulk_upsert_jobs.
+
+Each approach gets a fresh temporary SQLite database (with the configured
+journal mode) and writes the same run twice: first into the empty database,
+then again with --changed of the jobs edited, as a later run finds them.
+
+Usage (from backend/):
+    python benchmarks/bench_upsert.py [--jobs 5000] [--changed 0.1] [--batch-size 500]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import sessionmaker
+
+from corpus import make_jobs
+from db import Base, bulk_upsert_jobs, make_engine, upsert_job
+from util import annotate_jobs
+
+
+def per_job(session, jobs, batch_size):
+    """Previous behaviour: a SELECT, a commit and a refresh per job."""
+    for job in jobs:
+        upsert_job(session, job)
+
+
+def bulk(session, jobs, batch_size):
+    return bulk_upsert_jobs(session, jobs, batch_size=batch_size)
+
+
+def run(label, write, first, second, batch_size):
+    engine = make_engine(f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    timings = []
+    for jobs in (first, second):
+        start = time.perf_counter()
+        counts = write(session, jobs, batch_size)
+        timings.append(time.perf_counter() - start)
+    session.close()
+    engine.dispose()
+    rate = len(first) / timings[0]
+    print(f"{label:>16}: first run {timings[0]:.2f} s ({rate:.0f} jobs/s), second run {timings[1]:.2f} s"
+          + (f" {counts}" if counts else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--changed", type=float, default=0.1, help="share of jobs edited before the second run")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    first = annotate_jobs(make_jobs(args.jobs))
+    edited = int(args.jobs * args.changed)
+    second = annotate_jobs([{**job, "description": job["description"] + " Updated."} if i < edited else job
+                            for i, job in enumerate(make_jobs(args.jobs))])
+    run("upsert_job", per_job, first, second, args.batch_size)
+    run("bulk_upsert_jobs", bulk, first, second, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Synthetic job corpus shared by the benchmark scripts.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import List, Dict
+
+TITLES = [
+    "Senior Bioinformatics Scientist", "Computational Biologist, Single-Cell Genomics",
+    "Data Scientist - Clinical Analytics", "Machine Learning Engineer", "Research Associate, Cell Culture",
+    "Staff Software Engineer, Data Platform", "Principal Statistician", "Lab Technician II",
+    "Director of Data Science", "Scientist, Assay Development", "ML Engineer - Drug Discovery",
+    "Bioinformatics Engineer, NGS Pipelines", "Clinical Data Analyst", "Associate Director, Regulatory Affairs",
+]
+
+FILLER = (
+    "we are looking for a motivated scientist to join our team and help build the future of medicine "
+    "you will collaborate with cross functional partners across research clinical and product groups "
+    "the ideal candidate has strong communication skills and a passion for patients and science "
+    "responsibilities include designing experiments reviewing results and presenting to leadership "
+    "benefits include competitive salary equity health insurance and flexible working arrangements"
+).split()
+
+TERMS = [
+    "bioinformatics", "genomics", "rna-seq", "single cell", "python", "machine learning", "statistics",
+    "pipeline", "docker", "aws", "sql", "pandas", "analysis", "modeling", "visualization", "pcr",
+    "cell culture", "western blot", "flow cytometry", "data science", "deep learning", "workflow",
+    "variant calling", "gwas", "proteomics", "transcriptomics", "r programming", "linux", "git",
+]
+
+COMPANIES = ["benchling", "insitro", "freenome", "natera", "recursion", "Illumina", "Moderna", "Gilead"]
+LOCATIONS = [
+    "South San Francisco, CA", "Cambridge, MA", "Boston, Massachusetts", "New York, NY", "Remote",
+    "Seattle, WA", "San Diego, CA", "Remote - US", "Los Angeles, CA", "Chicago, IL",
+]
+SOURCES = ["greenhouse", "lever", "workday", "comprehensive"]
+
+
+def make_description(rnd: random.Random, words: int = 450) -> str:
+    """Build an HTML-escaped description similar to Greenhouse ``content``."""
+    out = []
+    for i in range(words):
+        if rnd.random() < 0.06:
+            out.append(rnd.choice(TERMS))
+        else:
+            out.append(rnd.choice(FILLER))
+        if i % 40 == 39:
+            out.append("&lt;/p&gt;&lt;p&gt;")
+    return "&lt;p&gt;" + " ".join(out) + "&lt;/p&gt;"
+
+
+def make_jobs(n: int, seed: int = 42) -> List[Dict]:
+    """Return ``n`` deterministic job dicts shaped like scraper output."""
+    rnd = random.Random(seed)
+    now = datetime(2025, 9, 1)
+    jobs = []
+    for i in range(n):
+        jobs.append({
+            "title": rnd.choice(TITLES),
+            "company": rnd.choice(COMPANIES),
+            "location": rnd.choice(LOCATIONS),
+            "url": f"https://example.com/jobs/{i}",
+            "source": rnd.choice(SOURCES),
+            "posted_at": now - timedelta(hours=rnd.randint(0, 24 * 90)),
+            "description": make_description(rnd),
+        })
+    return jobs
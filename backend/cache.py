@@ -0,0 +1,196 @@
+"""
+In-process caches with LRU eviction, size limits and hit/miss counters.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Set
+
+from starlette.responses import Response
+
+from settings import settings
+from util import content_hash, score_jobs
+
+
+class LRUCache:
+    """Thread-safe LRU mapping bounded by entry count and optional total weight.
+
+    ``weigher`` returns the cost of a value (e.g. its size in bytes); when it
+    is given, least recently used entries are evicted until the summed
+    weight fits ``max_weight``. ``on_evict(key, value)`` is called for every
+    entry evicted to make room.
+    """
+
+    def __init__(self, maxsize: int, max_weight: Optional[int] = None,
+                 weigher: Optional[Callable[[Any], int]] = None,
+                 on_evict: Optional[Callable[[Hashable, Any], None]] = None):
+        self.maxsize = maxsize
+        self.max_weight = max_weight
+        self.weigher = weigher
+        self.on_evict = on_evict
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _weigh(self, value: Any) -> int:
+        return self.weigher(value) if self.weigher else 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            if key in self._data:
+                self.weight -= self._weigh(self._data.pop(key))
+            self._data[key] = value
+            self.weight += self._weigh(value)
+            self._evict()
+
+    def pop(self, key: Hashable) -> Any:
+        with self._lock:
+            value = self._data.pop(key, None)
+            if value is not None:
+                self.weight -= self._weigh(value)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+    def _evict(self) -> None:
+        while self._data and (
+            len(self._data) > self.maxsize
+            or (self.max_weight is not None and self.weight > self.max_weight)
+        ):
+            key, value = self._data.popitem(last=False)
+            self.weight -= self._weigh(value)
+            self.evictions += 1
+            if self.on_evict:
+                self.on_evict(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        stats = {
+            "entries": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        if self.max_weight is not None:
+            stats.update(weight=self.weight, max_weight=self.max_weight)
+        return stats
+
+
+def normalize_query(search_query: Optional[str]) -> Optional[str]:
+    """Cache key for a search query; queries that score identically share a key."""
+    if not search_query:
+        return None
+    return search_query.strip().lower()
+
+
+def _job_hash(job) -> str:
+    stored = job.get("content_hash") if isinstance(job, dict) else getattr(job, "content_hash", None)
+    return stored or content_hash(job)
+
+
+class ScoreCache:
+    """Memoizes ``score_jobs`` per (job content hash, normalized query)."""
+
+    def __init__(self, maxsize: int):
+        self.entries = LRUCache(maxsize, on_evict=self._forget)
+        self._keys_by_hash: Dict[str, Set] = {}
+        self._lock = threading.Lock()
+
+    def score(self, jobs: Iterable, search_query: Optional[str] = None) -> List[float]:
+        """Scores for ``jobs``; only cache misses are scored (in one batch)."""
+        jobs = list(jobs)
+        query_key = normalize_query(search_query)
+        keys = [(_job_hash(job), query_key) for job in jobs]
+        scores = [0.0] * len(jobs)
+        missing: List[int] = []
+        for i, key in enumerate(keys):
+            cached = self.entries.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                scores[i] = cached
+        if missing:
+            fresh = score_jobs([jobs[i] for i in missing], search_query)
+            for i, value in zip(missing, fresh):
+                scores[i] = value
+                self._store(keys[i], value)
+        return scores
+
+    def _store(self, key, value: float) -> None:
+        self.entries.set(key, value)
+        with self._lock:
+            self._keys_by_hash.setdefault(key[0], set()).add(key)
+
+    def _forget(self, key, value) -> None:
+        with self._lock:
+            keys = self._keys_by_hash.get(key[0])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_hash[key[0]]
+
+    def invalidate(self, job_hash: Optional[str]) -> None:
+        """Drop every cached score of a job whose content changed."""
+        if not job_hash:
+            return
+        with self._lock:
+            keys = self._keys_by_hash.pop(job_hash, ())
+        for key in keys:
+            self.entries.pop(key)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        with self._lock:
+            self._keys_by_hash.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.entries.stats()
+
+
+class CachedResponse(NamedTuple):
+    """Serialized body and headers of a read endpoint response."""
+    body: bytes
+    headers: Dict[str, str]
+    media_type: str
+
+    @classmethod
+    def of(cls, response: Response) -> "CachedResponse":
+        headers = {key: value for key, value in response.headers.items()
+                   if key not in ("content-length", "content-type")}
+        return cls(bytes(response.body), headers, response.media_type)
+
+    def response(self) -> Response:
+        return Response(self.body, headers=self.headers, media_type=self.media_type)
+
+
+score_cache = ScoreCache(maxsize=settings.SCORE_CACHE_SIZE)
+
+# Read endpoint responses keyed by ETag (ingestion generation + normalized request);
+# cleared by db.bump_generation
+response_cache = LRUCache(
+    maxsize=settings.RESPONSE_CACHE_SIZE,
+    max_weight=settings.RESPONSE_CACHE_MAX_BYTES,
+    weigher=lambda entry: len(entry.body),
+)
@@ -0,0 +1,160 @@
+"""
+Negotiated response compression (brotli or gzip) for JSON, NDJSON and CSV bodies.
+
+Bodies under a size threshold are sent as they are. Streamed bodies
+(NDJSON pages) are compressed chunk by chunk and flushed after each chunk,
+so rows still reach the client while later ones are being scored. Exports
+compress their own multi-megabyte chunks off the event loop with
+``compress_chunks`` and are passed through, as is any response that
+already has a Content-Encoding.
+"""
+
+import zlib
+from typing import Dict, Iterator, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional: without it responses fall back to gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/csv")
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Content codings of an Accept-Encoding header with their q-values."""
+    encodings = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            encodings[coding.strip().lower()] = quality
+    return encodings
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred coding we can produce ("br", then "gzip"), or None for identity."""
+    encodings = accepted_encodings(accept_encoding)
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    candidates = [(encodings.get(coding, encodings.get("*", 0.0)), -i, coding) for i, coding in enumerate(supported)]
+    quality, _, coding = max(candidates)
+    return coding if quality > 0 else None
+
+
+class Compressor:
+    """Incremental compressor of one response body."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Compress ``data``; with ``flush`` everything given so far can be decoded."""
+        if self.encoding == "br":
+            return self._brotli.process(data) + (self._brotli.flush() if flush else b"")
+        return self._zlib.compress(data) + (self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else b"")
+
+    def finish(self) -> bytes:
+        return self._brotli.finish() if self.encoding == "br" else self._zlib.flush()
+
+
+def compress_chunks(chunks: Iterator[bytes], compressor: Compressor) -> Iterator[bytes]:
+    """Compressed ``chunks``, each flushed so it can be decoded on arrival; closing it closes ``chunks``."""
+    try:
+        for chunk in chunks:
+            if chunk:
+                yield compressor.compress(chunk, flush=True)
+        yield compressor.finish()
+    finally:
+        chunks.close()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing JSON, NDJSON and CSV responses the client accepts compressed."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding, self))
+
+
+class _CompressingSend:
+    """``send`` wrapper holding back the response start until the body shows whether to compress."""
+
+    def __init__(self, send: Send, encoding: str, middleware: CompressionMiddleware):
+        self.send = send
+        self.encoding = encoding
+        self.middleware = middleware
+        self.start: Optional[Message] = None
+        self.compressor: Optional[Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+        elif message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "").split(";")[0].strip()
+            if media_type not in COMPRESSIBLE_TYPES or "content-encoding" in headers:
+                self.passthrough = True
+                await self.send(message)
+            else:
+                self.start = message
+        elif message["type"] == "http.response.body":
+            await self._body(message)
+        else:
+            await self.send(message)
+
+    async def _body(self, message: Message) -> None:
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.middleware.minimum_size:
+                # Whole body in one message and too small to be worth it
+                self.passthrough = True
+                self.start["headers"] = headers.raw
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self.compressor = Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            headers["Content-Encoding"] = self.encoding
+            if "content-length" in headers:
+                del headers["content-length"]
+            if not more_body:
+                compressed = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(compressed))
+                self.start["headers"] = headers.raw
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            self.start["headers"] = headers.raw
+            await self.send(self.start)
+        if more_body:
+            chunk = self.compressor.compress(body, flush=True)
+        else:
+            chunk = self.compressor.compress(body) + self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
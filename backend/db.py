@@ -1,12 +1,102 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, UniqueConstraint, Float
-from sqlalchemy.orm import declarative_base, sessionmaker
-from datetime import datetime
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime, Text, UniqueConstraint, Float, JSON, ForeignKey, Index, inspect, text, table, column, literal_column, func, select, insert, or_
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from datetime import datetime, timedelta
+import logging
+import re
 from settings import settings
+from util import FEATURES_VERSION, job_features, stored_features, job_vocabulary, stored_vocabulary, content_hash, job_snippet
+from cache import score_cache, response_cache
+from regions import REGIONS_VERSION, location_regions
+from job_types import JOB_TYPES_VERSION, classify_job
 
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {})
+# Connection pool (pool_size, max_overflow) per process by DEPLOYMENT_MODE, unless set in settings. Production
+# runs several gunicorn workers, each with a threadpool of sync endpoints plus the scheduler
+POOL_SIZES = {
+    "development": (5, 10),
+    "production": (10, 20),
+}
+
+def sqlite_pragmas():
+    """PRAGMA statements run on every new SQLite connection.
+
+    WAL lets readers proceed while the scheduler writes, and with
+    synchronous=NORMAL a commit no longer fsyncs the database file (only
+    WAL checkpoints do). mmap and a larger page cache serve reads from
+    memory; busy_timeout makes a writer wait for the lock instead of
+    failing with "database is locked".
+    """
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KIB}",  # Negative: KiB rather than pages
+        f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+    ]
+
+def pool_options():
+    pool_size, max_overflow = POOL_SIZES.get(settings.DEPLOYMENT_MODE, POOL_SIZES["development"])
+    return {
+        "pool_size": pool_size if settings.DB_POOL_SIZE is None else settings.DB_POOL_SIZE,
+        "max_overflow": max_overflow if settings.DB_MAX_OVERFLOW is None else settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+def engine_options(url, pool_class):
+    """create_engine / create_async_engine keyword arguments for a database URL."""
+    if not url.startswith("sqlite"):
+        return {**pool_options(), "pool_recycle": settings.DB_POOL_RECYCLE, "pool_pre_ping": True}
+    options = {"connect_args": {"check_same_thread": False}}
+    if ":memory:" not in url and "mode=memory" not in url:
+        # File databases get a sized pool; in-memory ones keep SQLAlchemy's single-connection pool
+        options.update(pool_options(), poolclass=pool_class)
+    return options
+
+def listen_sqlite_pragmas(engine):
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+def make_engine(url):
+    """Engine for ``url`` with the pool settings and, for SQLite, the connection pragmas."""
+    engine = create_engine(url, **engine_options(url, QueuePool))
+    if engine.dialect.name == "sqlite":
+        listen_sqlite_pragmas(engine)
+    return engine
+
+engine = make_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+def async_database_url(url):
+    """DATABASE_URL with the asyncio driver of its backend (aiosqlite for SQLite)."""
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+def make_async_engine(url):
+    async_engine = create_async_engine(url, **engine_options(url, AsyncAdaptedQueuePool))
+    if async_engine.dialect.name == "sqlite":
+        listen_sqlite_pragmas(async_engine.sync_engine)
+    return async_engine
+
+# Async endpoints share the database through their own engine; the scheduler and CPU-bound endpoints use the one above
+async_engine = make_async_engine(settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
+logger = logging.getLogger(__name__)
+
 class Job(Base):
     __tablename__ = "jobs"
     id = Column(Integer, primary_key=True, index=True)
@@ -18,31 +108,504 @@ class Job(Base):
     posted_at = Column(DateTime, index=True, default=datetime.utcnow)
     description = Column(Text)
     score = Column(Float, default=0.0)  # relevance score
+    features = Column(JSON)  # keyword hit bitmaps and counts, see util.job_features
+    vocabulary = Column(JSON)  # unique title/description words with counts, see util.job_vocabulary
+    content_hash = Column(String(40))  # sha1 of title + description, keys the score cache
+    snippet = Column(Text)  # plain-text description excerpt for list views, see util.job_snippet
+    last_seen_at = Column(DateTime)  # last time ingestion returned this job
+    regions = relationship("JobRegion", cascade="all, delete-orphan", passive_deletes=True)
+    types = relationship("JobType", cascade="all, delete-orphan", passive_deletes=True)
 
     __table_args__ = (
         UniqueConstraint('url', name='uq_job_url'),
     )
 
+class JobRegion(Base):
+    """Canonical metro region of a job (see regions.REGIONS); one row per job and region."""
+    __tablename__ = "job_regions"
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    region = Column(String, primary_key=True)
+
+    __table_args__ = (
+        Index('ix_job_regions_region_job_id', 'region', 'job_id'),
+    )
+
+class JobType(Base):
+    """Job-type category of a job (see job_types.JOB_TYPES); one row per job and type."""
+    __tablename__ = "job_types"
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    job_type = Column(String, primary_key=True)
+
+    __table_args__ = (
+        Index('ix_job_types_job_type_job_id', 'job_type', 'job_id'),
+    )
+
+class IngestionState(Base):
+    """Single row counting committed ingestion runs; read endpoints derive ETags from it."""
+    __tablename__ = "ingestion_state"
+    id = Column(Integer, primary_key=True)
+    generation = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    job_types_version = Column(Integer)  # job_types.JOB_TYPES_VERSION of the stored job_types rows
+    regions_version = Column(Integer)  # regions.REGIONS_VERSION of the stored job_regions rows
+    lease_owner = Column(String)  # Ingestion run currently writing the corpus (see acquire_ingestion_lease)
+    lease_expires_at = Column(DateTime)
+
+INGESTION_STATE_ID = 1
+
+def get_generation(session):
+    """(generation, updated_at) of the data currently committed."""
+    row = session.get(IngestionState, INGESTION_STATE_ID)
+    if row is None:
+        return 0, datetime(1970, 1, 1)
+    return row.generation, row.updated_at
+
+def acquire_ingestion_lease(session, owner):
+    """Take the ingestion lease for ``owner``; False while another run holds an unexpired one.
+
+    One conditional UPDATE, so two processes (API workers, the standalone
+    ingestor) can never both get it. A lease whose holder died without
+    releasing it lapses after INGESTION_LEASE_SECONDS.
+    """
+    now = datetime.utcnow()
+    acquired = session.query(IngestionState).filter(
+        IngestionState.id == INGESTION_STATE_ID,
+        or_(IngestionState.lease_owner.is_(None), IngestionState.lease_owner == owner,
+            IngestionState.lease_expires_at < now),
+    ).update(
+        {IngestionState.lease_owner: owner,
+         IngestionState.lease_expires_at: now + timedelta(seconds=settings.INGESTION_LEASE_SECONDS)},
+        synchronize_session=False,
+    )
+    session.commit()
+    return bool(acquired)
+
+def release_ingestion_lease(session, owner):
+    """Give up the ingestion lease if ``owner`` still holds it."""
+    session.query(IngestionState).filter(
+        IngestionState.id == INGESTION_STATE_ID, IngestionState.lease_owner == owner,
+    ).update({IngestionState.lease_owner: None, IngestionState.lease_expires_at: None}, synchronize_session=False)
+    session.commit()
+
+class JobStats(Base):
+    """Single-row summary of the jobs table, rewritten by refresh_job_stats."""
+    __tablename__ = "job_stats"
+    id = Column(Integer, primary_key=True)
+    total_jobs = Column(Integer, nullable=False, default=0)
+    total_companies = Column(Integer, nullable=False, default=0)
+    total_sources = Column(Integer, nullable=False, default=0)
+    latest_job_date = Column(DateTime)
+    last_run_at = Column(DateTime)  # end of the last ingestion run
+    sources = Column(JSON)  # {source: {"jobs": n, "latest_job_date": iso, "last_seen_at": iso}}
+    companies = Column(JSON)  # {company: jobs}
+    regions = Column(JSON)  # {region code: jobs}
+    updated_at = Column(DateTime)
+
+JOB_STATS_ID = 1
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+def refresh_job_stats(session, run_at=None):
+    """Recompute the job_stats row (not committed); ``run_at`` records a finished ingestion run."""
+    per_source = session.query(
+        Job.source, func.count(Job.id), func.max(Job.posted_at), func.max(Job.last_seen_at)
+    ).group_by(Job.source).all()
+    per_company = session.query(Job.company, func.count(Job.id)).group_by(Job.company).all()
+    per_region = session.query(JobRegion.region, func.count(JobRegion.job_id)).group_by(JobRegion.region).all()
+
+    stats = session.get(JobStats, JOB_STATS_ID) or JobStats(id=JOB_STATS_ID)
+    stats.total_jobs = sum(count for _, count, _, _ in per_source)
+    stats.total_companies = len(per_company)
+    stats.total_sources = len(per_source)
+    stats.latest_job_date = max((latest for _, _, latest, _ in per_source if latest), default=None)
+    stats.sources = {
+        source: {"jobs": count, "latest_job_date": _isoformat(latest), "last_seen_at": _isoformat(seen)}
+        for source, count, latest, seen in per_source
+    }
+    stats.companies = {company: count for company, count in per_company}
+    stats.regions = {region: count for region, count in per_region}
+    stats.updated_at = datetime.utcnow()
+    if run_at is not None:
+        stats.last_run_at = run_at
+    session.add(stats)
+    return stats
+
+def bump_generation(session, run_at=None):
+    """Record that new job data was committed; call after each ingestion run or write.
+
+    Refreshes job_stats in the same transaction; pass ``run_at`` at the end
+    of an ingestion run. In-memory indexes of this process should be
+    refreshed before, so that nothing computed from them is tagged with
+    the new generation while they lag behind. Returns the new generation.
+    """
+    refresh_job_stats(session, run_at)
+    now = datetime.utcnow().replace(microsecond=0)
+    updated = session.query(IngestionState).filter(IngestionState.id == INGESTION_STATE_ID).update(
+        {IngestionState.generation: IngestionState.generation + 1, IngestionState.updated_at: now},
+        synchronize_session=False,
+    )
+    if not updated:
+        session.add(IngestionState(id=INGESTION_STATE_ID, generation=1, updated_at=now))
+        session.flush()
+    generation = session.query(IngestionState.generation).filter(IngestionState.id == INGESTION_STATE_ID).scalar()
+    session.commit()
+    response_cache.clear()
+    return generation
+
+def assign_regions(job):
+    """Sync job.regions with the canonical regions of job.location."""
+    codes = location_regions(job.location)
+    current = {region.region: region for region in job.regions}
+    for code, region in current.items():
+        if code not in codes:
+            job.regions.remove(region)
+    for code in codes:
+        if code not in current:
+            job.regions.append(JobRegion(region=code))
+
+def assign_job_types(job):
+    """Sync job.types with the job-type classification of its title, description and features."""
+    codes = classify_job(job)
+    current = {job_type.job_type: job_type for job_type in job.types}
+    for code, job_type in current.items():
+        if code not in codes:
+            job.types.remove(job_type)
+    for code in codes:
+        if code not in current:
+            job.types.append(JobType(job_type=code))
+
+def delete_jobs(session, *criteria):
+    """Bulk-delete the jobs matching ``criteria`` together with their region and job-type rows."""
+    job_ids = select(Job.id).where(*criteria)
+    session.query(JobRegion).filter(JobRegion.job_id.in_(job_ids)).delete(synchronize_session=False)
+    session.query(JobType).filter(JobType.job_id.in_(job_ids)).delete(synchronize_session=False)
+    deleted = session.query(Job).filter(*criteria).delete(synchronize_session=False)
+    session.commit()
+    return deleted
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    init_fts()
+    session = SessionLocal()
+    try:
+        backfilled = backfill_derived_fields(session) + backfill_regions(session) + backfill_job_types(session)
+        missing_state = session.get(IngestionState, INGESTION_STATE_ID) is None or session.get(JobStats, JOB_STATS_ID) is None
+        if backfilled or missing_state:
+            bump_generation(session)
+    finally:
+        session.close()
+
+def add_missing_columns():
+    """Add model columns that an existing database was created without."""
+    inspector = inspect(engine)
+    for model_table in Base.metadata.sorted_tables:
+        if not inspector.has_table(model_table.name):
+            continue
+        existing = {info["name"] for info in inspector.get_columns(model_table.name)}
+        for model_column in model_table.columns:
+            if model_column.name not in existing:
+                column_type = model_column.type.compile(dialect=engine.dialect)
+                with engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {model_table.name} ADD COLUMN {model_column.name} {column_type}"))
+
+BACKFILL_BATCH_SIZE = 500
+
+def backfill_derived_fields(session):
+    """Compute features, vocabularies, content hashes and snippets for rows stored without current ones.
+
+    Runs at every startup, so the rows needing it are found in SQL (ids
+    only) and loaded and committed BACKFILL_BATCH_SIZE at a time.
+    """
+    stale = or_(
+        Job.features["version"].as_integer().is_(None),  # SQL or JSON null, or features without a version
+        Job.features["version"].as_integer() != FEATURES_VERSION,
+        Job.vocabulary.is_(None),
+        Job.content_hash.is_(None),
+        Job.content_hash == "",
+        Job.snippet.is_(None),
+    )
+    job_ids = [job_id for (job_id,) in session.query(Job.id).filter(stale)]
+    updated = 0
+    for start in range(0, len(job_ids), BACKFILL_BATCH_SIZE):
+        batch = job_ids[start:start + BACKFILL_BATCH_SIZE]
+        for job in session.query(Job).filter(Job.id.in_(batch)):
+            if stored_features(job) is None or stored_vocabulary(job) is None or not job.content_hash or job.snippet is None:
+                job.features = job_features(job)
+                job.vocabulary = job_vocabulary(job)
+                job.content_hash = content_hash(job)
+                job.snippet = job_snippet(job.description)
+                assign_job_types(job)  # Job types follow the keyword tiers of the features
+                updated += 1
+        session.commit()
+        session.expunge_all()  # Keep one batch of rows in memory
+    return updated
+
+def backfill_regions(session):
+    """Fill job_regions for jobs stored without any region row.
+
+    Every job is re-tagged when the stored rows come from other region
+    patterns (an older REGIONS_VERSION).
+    """
+    state = session.get(IngestionState, INGESTION_STATE_ID) or IngestionState(id=INGESTION_STATE_ID, generation=0)
+    retagged = state.regions_version != REGIONS_VERSION
+    if retagged:
+        session.query(JobRegion).delete(synchronize_session=False)
+    has_regions = select(JobRegion.job_id).where(JobRegion.job_id == Job.id).exists()
+    rows = [
+        {"job_id": job_id, "region": code}
+        for job_id, location in session.query(Job.id, Job.location).filter(~has_regions).yield_per(BACKFILL_BATCH_SIZE)
+        for code in location_regions(location)
+    ]
+    if rows:
+        session.execute(insert(JobRegion), rows)
+    if retagged:
+        state.regions_version = REGIONS_VERSION
+        session.add(state)
+    session.commit()
+    return len(rows)
+
+def backfill_job_types(session):
+    """Fill job_types for jobs stored without any job-type row.
+
+    Every job is reclassified when the stored rows come from other
+    classification terms (an older JOB_TYPES_VERSION).
+    """
+    state = session.get(IngestionState, INGESTION_STATE_ID) or IngestionState(id=INGESTION_STATE_ID, generation=0)
+    reclassified = state.job_types_version != JOB_TYPES_VERSION
+    if reclassified:
+        session.query(JobType).delete(synchronize_session=False)
+    has_types = select(JobType.job_id).where(JobType.job_id == Job.id).exists()
+    columns = (Job.id, Job.title, Job.description, Job.features)
+    rows = [
+        {"job_id": row.id, "job_type": code}
+        for row in session.query(*columns).filter(~has_types).yield_per(BACKFILL_BATCH_SIZE)
+        for code in classify_job(row)
+    ]
+    if rows:
+        session.execute(insert(JobType), rows)
+    if reclassified:
+        state.job_types_version = JOB_TYPES_VERSION
+        session.add(state)
+    session.commit()
+    return len(rows)
+
+# Full-text index over jobs (SQLite FTS5); rowid is jobs.id and triggers keep it in sync
+FTS_TABLE = "jobs_fts"
+FTS_COLUMNS = ("title", "company", "description")
+FTS_WEIGHTS = (10.0, 4.0, 1.0)  # bm25() weight per column: title matches count most
+jobs_fts = table(FTS_TABLE, column("rowid"))
+_fts_enabled = None
+
+def fts_table_sql(name=FTS_TABLE):
+    """CREATE statement of the FTS5 index, under ``name``."""
+    return f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({', '.join(FTS_COLUMNS)}, tokenize = 'unicode61 remove_diacritics 2')"
+
+def create_fts_triggers(conn):
+    """Create the triggers keeping jobs_fts in sync with inserts, deletes and updates of jobs."""
+    columns = ", ".join(FTS_COLUMNS)
+    new_values = ", ".join(f"new.{name}" for name in FTS_COLUMNS)
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON jobs BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});
+        END"""))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON jobs BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END"""))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {columns} ON jobs BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});
+        END"""))
+
+def init_fts():
+    """Create the FTS5 index and its sync triggers; no-op for non-SQLite databases."""
+    global _fts_enabled
+    if engine.dialect.name != "sqlite":
+        _fts_enabled = False
+        return
+    columns = ", ".join(FTS_COLUMNS)
+    try:
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+            ).first()
+            conn.execute(text(fts_table_sql()))
+            create_fts_triggers(conn)
+            if not exists:
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}(rowid, {columns}) SELECT id, {columns} FROM jobs"))
+        _fts_enabled = True
+    except OperationalError as e:
+        logger.warning(f"SQLite FTS5 unavailable, falling back to LIKE search: {e}")
+        _fts_enabled = False
+
+def fts_enabled():
+    """Whether /api/jobs searches can use the FTS5 index."""
+    global _fts_enabled
+    if _fts_enabled is None:
+        _fts_enabled = engine.dialect.name == "sqlite" and inspect(engine).has_table(FTS_TABLE)
+    return _fts_enabled
+
+def fts_match_query(q):
+    """Translate a free-text search into an FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term (so 'bioinformatic' also finds
+    'bioinformatician') and all of them must match. Returns None when the
+    search has no indexable words.
+    """
+    words = re.findall(r"\w+", (q or "").lower())
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+def fts_search(query, match_query, domain_weight=0.0):
+    """Restrict a Job query to FTS matches, best BM25 rank first.
+
+    With ``domain_weight`` > 0 the BM25 rank is boosted by the stored
+    domain relevance score (0-100) of each job.
+    """
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    rank = literal_column(f"bm25({FTS_TABLE}, {weights})")
+    if domain_weight:
+        # bm25() is negative (lower is better), so a larger factor ranks higher
+        rank = rank * (1 + domain_weight * func.coalesce(Job.score, 0) / 100.0)
+    return (
+        query.join(jobs_fts, jobs_fts.c.rowid == Job.id)
+        .filter(text(f"{FTS_TABLE} MATCH :fts_query").bindparams(fts_query=match_query))
+        .order_by(rank, Job.posted_at.desc())
+    )
 
 def get_session():
     """Get a database session."""
     return SessionLocal()
 
+def prepare_job(job_data):
+    """Job dict completed with the derived fields stored on every row (features, vocabulary, snippet, content hash)."""
+    if stored_features(job_data) is None:
+        job_data = {**job_data, "features": job_features(job_data)}
+    if stored_vocabulary(job_data) is None:
+        job_data = {**job_data, "vocabulary": job_vocabulary(job_data)}
+    if job_data.get("snippet") is None:
+        job_data = {**job_data, "snippet": job_snippet(job_data.get("description"))}
+    return {**job_data, "content_hash": content_hash(job_data), "last_seen_at": datetime.utcnow()}
+
 def upsert_job(session, job_data):
     """Insert or update a job in the database."""
+    job_data = prepare_job(job_data)
     existing = session.query(Job).filter(Job.url == job_data["url"]).first()
     if existing:
+        if existing.content_hash != job_data["content_hash"]:
+            score_cache.invalidate(existing.content_hash)
         for field, value in job_data.items():
             if hasattr(existing, field):
                 setattr(existing, field, value)
+        assign_regions(existing)
+        assign_job_types(existing)
         session.add(existing)
         session.commit()
         session.refresh(existing)
         return existing
     row = Job(**job_data)
+    assign_regions(row)
+    assign_job_types(row)
     session.add(row)
     session.commit()
     session.refresh(row)
     return row
+
+# Columns compared to tell an updated job from an unchanged one; content_hash covers title and description.
+# Not posted_at: scrapers without a posting date stamp the fetch time, which differs on every run
+UPSERT_COMPARED = ("content_hash", "company", "location", "source", "score")
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def _unchanged(row, current):
+    """Whether a prepared job dict matches the UPSERT_COMPARED columns of its stored row."""
+    return all(row.get(name) == getattr(current, name) for name in UPSERT_COMPARED)
+
+def bulk_upsert_jobs(session, jobs, batch_size=None):
+    """Insert or update job dicts by URL, one transaction per batch; returns inserted/updated/unchanged counts.
+
+    New and changed jobs are written with one dialect-native INSERT ... ON
+    CONFLICT(url) DO UPDATE per batch (SQLite and PostgreSQL; other
+    dialects fall back to upsert_job per job); unchanged ones only get
+    last_seen_at refreshed. When a URL occurs twice, the last job wins. A
+    job without posted_at keeps the stored one.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect not in UPSERT_INSERTS:
+        return _upsert_each(session, jobs)
+    jobs = list(jobs)
+    batch_size = batch_size or settings.UPSERT_BATCH_SIZE
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    for start in range(0, len(jobs), batch_size):
+        for key, count in _upsert_batch(session, jobs[start:start + batch_size], UPSERT_INSERTS[dialect]).items():
+            counts[key] += count
+    return counts
+
+def _upsert_each(session, jobs):
+    """bulk_upsert_jobs without INSERT ... ON CONFLICT: upsert_job for each new or changed job."""
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    latest = {job_data["url"]: job_data for job_data in jobs}  # Later duplicates replace earlier ones
+    for url, job_data in latest.items():
+        job_data = prepare_job(job_data)
+        job_data["score"] = job_data.get("score") or 0.0
+        if job_data.get("posted_at") is None:
+            job_data.pop("posted_at", None)  # Keeps the stored date, or gets the Job.posted_at default
+        current = session.execute(select(*[getattr(Job, name) for name in UPSERT_COMPARED]).where(Job.url == url)).first()
+        if current is not None and _unchanged(job_data, current):
+            session.query(Job).filter(Job.url == url).update({Job.last_seen_at: job_data["last_seen_at"]}, synchronize_session=False)
+            session.commit()
+            counts["unchanged"] += 1
+            continue
+        upsert_job(session, job_data)
+        counts["inserted" if current is None else "updated"] += 1
+    return counts
+
+def _upsert_batch(session, jobs, dialect_insert):
+    now = datetime.utcnow()
+    columns = [column.key for column in Job.__table__.columns if column.key != "id"]
+    rows = {}
+    for job_data in jobs:
+        job_data = prepare_job(job_data)
+        rows[job_data["url"]] = {key: job_data.get(key) for key in columns}
+    existing = {
+        row.url: row
+        for row in session.execute(select(Job.url, *[getattr(Job, name) for name in UPSERT_COMPARED]).where(Job.url.in_(rows)))
+    }
+
+    changed, unchanged, inserted = [], [], 0
+    for url, row in rows.items():
+        row["score"] = row["score"] or 0.0
+        current = existing.get(url)
+        if current is None:
+            row["posted_at"] = row["posted_at"] or now  # Job.posted_at default
+            changed.append(row)
+            inserted += 1
+        elif _unchanged(row, current):
+            unchanged.append(url)
+        else:
+            if current.content_hash != row["content_hash"]:
+                score_cache.invalidate(current.content_hash)
+            changed.append(row)
+
+    if unchanged:
+        session.query(Job).filter(Job.url.in_(unchanged)).update({Job.last_seen_at: now}, synchronize_session=False)
+    if changed:
+        statement = dialect_insert(Job.__table__)
+        updates = {key: statement.excluded[key] for key in columns if key != "url"}
+        updates["posted_at"] = func.coalesce(statement.excluded.posted_at, Job.__table__.c.posted_at)  # Keep a known date
+        session.execute(statement.on_conflict_do_update(index_elements=[Job.url], set_=updates), changed)
+        # Regions and job types follow location, title and description: rewrite them for every written job
+        ids = dict(session.execute(select(Job.url, Job.id).where(Job.url.in_([row["url"] for row in changed]))).all())
+        session.query(JobRegion).filter(JobRegion.job_id.in_(ids.values())).delete(synchronize_session=False)
+        session.query(JobType).filter(JobType.job_id.in_(ids.values())).delete(synchronize_session=False)
+        region_rows = [{"job_id": ids[row["url"]], "region": code} for row in changed for code in location_regions(row["location"])]
+        type_rows = [{"job_id": ids[row["url"]], "job_type": code} for row in changed for code in classify_job(row)]
+        if region_rows:
+            session.execute(insert(JobRegion), region_rows)
+        if type_rows:
+            session.execute(insert(JobType), type_rows)
+    session.commit()
+    return {"inserted": inserted, "updated": len(changed) - inserted, "unchanged": len(unchanged)}
@@ -0,0 +1,175 @@
+"""
+Bulk export of jobs as CSV, NDJSON or Parquet for /api/export.
+
+Rows are read through a server-side cursor in EXPORT_BATCH_SIZE batches and
+encoded batch by batch, so memory stays bounded whatever the corpus size.
+Batches are produced on a small thread pool of their own: a long export
+never holds one of the threads that serve interactive requests, and
+concurrent exports take turns on the pool instead of piling up.
+"""
+
+import asyncio
+import csv
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterator, List, Optional, Set
+
+import orjson
+
+from db import SessionLocal, Job
+from settings import settings
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: without it Parquet exports are unavailable
+    pa = pq = None
+
+EXPORT_COLUMNS = (Job.id, Job.title, Job.company, Job.location, Job.url, Job.source, Job.posted_at, Job.score,
+                  Job.description)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+_executor = ThreadPoolExecutor(max_workers=settings.EXPORT_WORKERS, thread_name_prefix="export")
+
+
+def parquet_available() -> bool:
+    return pa is not None
+
+
+class CSVEncoder:
+    def __init__(self):
+        self.header = True
+
+    def encode(self, rows) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if self.header:
+            writer.writerow(EXPORT_FIELDS)
+            self.header = False
+        writer.writerows(
+            [value.isoformat() if field == "posted_at" and value else value for field, value in zip(EXPORT_FIELDS, row)]
+            for row in rows
+        )
+        return buffer.getvalue().encode()
+
+    def finish(self) -> bytes:
+        return self.encode([]) if self.header else b""
+
+
+class NDJSONEncoder:
+    def encode(self, rows) -> bytes:
+        return b"".join(orjson.dumps(dict(zip(EXPORT_FIELDS, row))) + b"\n" for row in rows)
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _ParquetSink:
+    """Write-only file object collecting what the Parquet writer emits until it is drained."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+class ParquetEncoder:
+    """One Parquet row group per batch; the file footer is written by ``finish``."""
+
+    def __init__(self):
+        self.schema = pa.schema([
+            ("id", pa.int64()), ("title", pa.string()), ("company", pa.string()), ("location", pa.string()),
+            ("url", pa.string()), ("source", pa.string()), ("posted_at", pa.timestamp("us")),
+            ("score", pa.float64()), ("description", pa.string()),
+        ])
+        self.sink = _ParquetSink()
+        self.writer = pq.ParquetWriter(self.sink, self.schema, compression="zstd")
+
+    def encode(self, rows) -> bytes:
+        columns = list(zip(*rows)) if rows else [[] for _ in EXPORT_FIELDS]
+        self.writer.write_table(pa.Table.from_arrays([pa.array(values, type=field.type)
+                                                      for values, field in zip(columns, self.schema)],
+                                                     schema=self.schema))
+        return self.sink.drain()
+
+    def finish(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+
+ENCODERS = {"csv": CSVEncoder, "ndjson": NDJSONEncoder, "parquet": ParquetEncoder}
+
+
+def export_chunks(query, fmt: str, keep: Optional[Set[int]] = None) -> Iterator[bytes]:
+    """Encoded chunks of the rows of an EXPORT_COLUMNS query, one per batch.
+
+    ``keep`` restricts the export to those job ids (the matches of a search
+    index query). The request's session is closed before the body is sent,
+    so the rows are read through a session of their own.
+    """
+    encoder = ENCODERS[fmt]()
+    session = SessionLocal()
+    try:
+        rows = iter(query.with_session(session).yield_per(settings.EXPORT_BATCH_SIZE))
+        while True:
+            batch = [tuple(row) for row in islice(rows, settings.EXPORT_BATCH_SIZE)]
+            if not batch:
+                break
+            if keep is not None:
+                batch = [row for row in batch if row[0] in keep]
+            if batch:
+                yield encoder.encode(batch)
+        yield encoder.finish()
+    finally:
+        session.close()
+
+
+async def stream_export(chunks: Iterator[bytes]):
+    """Response body producing each chunk of ``chunks`` on the export thread pool."""
+    loop = asyncio.get_running_loop()
+    lock = threading.Lock()  # A disconnect may close the generator while a chunk is being made
+
+    def step():
+        with lock:
+            return next(chunks, None)
+
+    def close():
+        with lock:
+            chunks.close()
+
+    try:
+        while True:
+            chunk = await loop.run_in_executor(_executor, step)
+            if chunk is None:
+                break
+            if chunk:
+                yield chunk
+    finally:
+        await loop.run_in_executor(_executor, close)
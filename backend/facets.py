@@ -0,0 +1,127 @@
+"""
+In-memory facet bitmaps for /api/facets.
+
+Each facet value (a source, region, company or job type) owns a boolean
+mask over every job in the table. Counting how many jobs each option of
+the filter panel would return is then a handful of mask intersections,
+instead of one grouped SQL scan per facet.
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from db import Job, JobRegion, JobType
+
+FACETS = ("source", "region", "company", "job_type")
+
+
+class FacetSnapshot:
+    """Facet masks of one build; never mutated, so a request can use it without locking."""
+
+    def __init__(self, ids: np.ndarray, posted_at: np.ndarray, masks: Dict[str, Dict[str, np.ndarray]]):
+        self.ids = ids  # job id at each mask position
+        self.positions = {job_id: i for i, job_id in enumerate(ids.tolist())}
+        self.posted_at = posted_at
+        self.masks = masks
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def mask_of(self, job_ids: Iterable[int]) -> np.ndarray:
+        """Mask of an arbitrary id set (e.g. the jobs a search matches)."""
+        mask = np.zeros(len(self.ids), dtype=bool)
+        mask[[self.positions[job_id] for job_id in job_ids if job_id in self.positions]] = True
+        return mask
+
+    def select(self, facet: str, values: Iterable[str]) -> np.ndarray:
+        """Jobs having any of ``values`` for ``facet``."""
+        selected = np.zeros(len(self.ids), dtype=bool)
+        for value in values:
+            mask = self.masks[facet].get(value)
+            if mask is not None:
+                selected |= mask
+        return selected
+
+    def posted_since(self, cutoff: datetime) -> np.ndarray:
+        return self.posted_at >= np.datetime64(cutoff, "s")
+
+    def counts(self, base: Optional[np.ndarray], selections: Dict[str, np.ndarray]) -> Dict:
+        """Job counts per facet value, and the total, for the current filters.
+
+        ``base`` holds the filters that are not facets (search text, date
+        range); ``selections`` the mask selected by each filtered facet.
+        Each facet is counted with every filter except its own, so the
+        counts say how many jobs ticking that option would add.
+        """
+        base = np.ones(len(self.ids), dtype=bool) if base is None else base
+        result = {}
+        for facet in FACETS:
+            mask = base.copy()
+            for other, selected in selections.items():
+                if other != facet:
+                    mask &= selected
+            counts = {value: int(np.count_nonzero(values & mask)) for value, values in self.masks[facet].items()}
+            result[facet] = dict(sorted(
+                ((value, count) for value, count in counts.items() if count),
+                key=lambda item: (-item[1], item[0]),
+            ))
+        total = base.copy()
+        for selected in selections.values():
+            total &= selected
+        return {"total": int(np.count_nonzero(total)), "facets": result}
+
+
+class FacetIndex:
+    """Builds facet snapshots from the database; rebuilt after each ingestion run."""
+
+    def __init__(self):
+        self.current: Optional[FacetSnapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.current is not None
+
+    def build(self, session: Session) -> FacetSnapshot:
+        """Build masks from the jobs, job_regions and job_types tables and make them current."""
+        with self._lock:  # One build at a time; readers keep using the previous snapshot
+            rows = session.query(Job.id, Job.source, Job.company, Job.posted_at).order_by(Job.id).all()
+            ids = np.array([row.id for row in rows], dtype=np.int64)
+            positions = {job_id: i for i, job_id in enumerate(ids.tolist())}
+            posted_at = np.array([row.posted_at or datetime.min for row in rows], dtype="datetime64[s]")
+
+            def empty():
+                return np.zeros(len(ids), dtype=bool)
+
+            masks: Dict[str, Dict[str, np.ndarray]] = {facet: {} for facet in FACETS}
+            for i, row in enumerate(rows):
+                masks["source"].setdefault(row.source or "", empty())[i] = True
+                masks["company"].setdefault(row.company or "", empty())[i] = True
+            for job_id, region in session.query(JobRegion.job_id, JobRegion.region):
+                if job_id in positions:
+                    masks["region"].setdefault(region, empty())[positions[job_id]] = True
+            for job_id, job_type in session.query(JobType.job_id, JobType.job_type):
+                if job_id in positions:
+                    masks["job_type"].setdefault(job_type, empty())[positions[job_id]] = True
+
+            self.current = FacetSnapshot(ids, posted_at, masks)
+            return self.current
+
+    def refresh(self, session: Session) -> None:
+        """Rebuild after new data was committed; no-op until the index was first built."""
+        if self.ready:
+            self.build(session)
+
+    def stats(self) -> Dict:
+        snapshot = self.current
+        if snapshot is None:
+            return {"jobs": 0, "ready": False}
+        return {"jobs": len(snapshot), "values": {facet: len(snapshot.masks[facet]) for facet in FACETS},
+                "ready": True}
+
+
+facet_index = FacetIndex()
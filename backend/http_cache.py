@@ -0,0 +1,107 @@
+"""
+HTTP revalidation for read endpoints.
+
+Responses only change when new job data is committed, which bumps the
+ingestion generation (db.bump_generation). ETags are derived from that
+generation plus the normalized request, so a client holding a current copy
+gets a 304 without the endpoint querying the jobs table.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, NamedTuple, Optional
+
+from starlette.requests import Request
+
+# Browsers keep the response but revalidate it on every use
+CACHE_CONTROL = "no-cache"
+
+
+class Validators(NamedTuple):
+    etag: str
+    last_modified: datetime
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": format_datetime(self.last_modified, usegmt=True),
+            "Cache-Control": CACHE_CONTROL,
+        }
+
+
+def normalized_request(request: Request) -> str:
+    """Path plus query parameters in a canonical order, with the search text lower-cased."""
+    params = []
+    for key, value in request.query_params.multi_items():
+        value = value.strip()
+        if not value:
+            continue
+        params.append((key, value.lower() if key in ("q", "location", "job_type") else value))
+    return request.url.path + "?" + "&".join(f"{key}={value}" for key, value in sorted(params))
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Whether the client asked for NDJSON, by ``format=ndjson`` or its Accept header."""
+    return (request.query_params.get("format", "").strip().lower() == "ndjson"
+            or "application/x-ndjson" in request.headers.get("accept", ""))
+
+
+def window_start(request: Request) -> Optional[datetime]:
+    """Start of the hour that filters relative to the current time (``days``) resolve to, if the request has one."""
+    if not request.query_params.get("days", "").strip():
+        return None
+    return datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+
+
+def request_key(request: Request) -> str:
+    """Short stable digest of ``normalized_request``.
+
+    Filters relative to the current time (``days``) resolve to the hour, so
+    their key also changes every hour. NDJSON responses get keys of their own.
+    """
+    key = normalized_request(request)
+    if wants_ndjson(request):
+        key += "#ndjson"
+    window = window_start(request)
+    if window is not None:
+        key += "@" + window.strftime("%Y%m%d%H")
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def validators(request: Request, generation: int, updated_at: datetime) -> Validators:
+    """ETag and Last-Modified of a read endpoint's response for this request.
+
+    A response with a ``days`` window also changes when the window moves
+    (every hour), so its Last-Modified is never before the current hour.
+    """
+    last_modified = updated_at
+    window = window_start(request)
+    if window is not None:
+        last_modified = max(last_modified, window)
+    last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+    etag = f'W/"{generation}-{int(last_modified.timestamp())}-{request_key(request)}"'
+    return Validators(etag, last_modified)
+
+
+def not_modified(request: Request, current: Validators) -> bool:
+    """Whether the conditional headers of ``request`` match the current validators.
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        weak = current.etag[2:] if current.etag.startswith("W/") else current.etag
+        return "*" in tags or current.etag in tags or weak in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return current.last_modified <= since
+    return False
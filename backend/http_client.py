@@ -0,0 +1,54 @@
+"""
+Pooled HTTP client shared by the scrapers of an ingestion run.
+
+An ingestion run opens one ``httpx.AsyncClient`` and passes it to every
+scraper. Its connections stay alive between companies: the dozens of
+companies behind boards-api.greenhouse.io, api.lever.co or
+*.myworkdayjobs.com reuse a few TCP/TLS connections, and the DNS lookups
+behind them, instead of paying for new ones each. With the optional ``h2``
+package, HTTP/2 hosts multiplex concurrent requests over one connection.
+Requests are paced per host by rate_limit.RateLimitedTransport.
+"""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from rate_limit import RateLimitedTransport
+from settings import settings
+
+try:
+    import h2
+except ImportError:  # Optional: without it every host is spoken to over HTTP/1.1
+    h2 = None
+
+
+def http2_enabled() -> bool:
+    return settings.HTTP2 and h2 is not None
+
+
+def make_transport() -> httpx.AsyncHTTPTransport:
+    """Connection pool of a scraping client, sized by the HTTP_* settings."""
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncHTTPTransport(limits=limits, http2=http2_enabled())
+
+
+def make_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Client for scrapers, rate limited per host; close it (``async with``) when the run is over."""
+    return httpx.AsyncClient(transport=RateLimitedTransport(transport or make_transport()),
+                             timeout=settings.HTTP_TIMEOUT, follow_redirects=True)
+
+
+@asynccontextmanager
+async def use_client(client: Optional[httpx.AsyncClient] = None) -> AsyncIterator[httpx.AsyncClient]:
+    """``client`` when the caller passed one (left open), otherwise a client of its own, closed on exit."""
+    if client is not None:
+        yield client
+        return
+    async with make_client() as own:
+        yield own
@@ -1,11 +1,14 @@
 import asyncio
-import aiohttp
-from aiolimiter import AsyncLimiter
+import logging
+import uuid
+import httpx
 import yaml
 from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
 
 # Import database and scrapers
-from db import SessionLocal, upsert_job, init_db, Job
+from db import SessionLocal, bulk_upsert_jobs, init_db, Job, delete_jobs, bump_generation, acquire_ingestion_lease, release_ingestion_lease
 from scrapers import lever as lever_scraper
 from scrapers import greenhouse as greenhouse_scraper
 from scrapers import ycombinator as yc_scraper
@@ -14,7 +17,24 @@ from scrapers import angellist as angellist_scraper
 from scrapers import bamboo as bamboo_scraper
 from scrapers import comprehensive as comprehensive_scraper
 from scrapers import talentbrew as talentbrew_scraper
-from util import score_job
+from util import annotate_jobs
+from settings import settings
+from http_client import make_client
+from rate_limit import RATE_LIMITS_KEY
+
+logger = logging.getLogger(__name__)
+
+# Scraper module of each companies.yaml source
+SCRAPERS = {
+    "lever": lever_scraper,
+    "greenhouse": greenhouse_scraper,
+    "ycombinator": yc_scraper,
+    "workday": workday_scraper,
+    "angellist": angellist_scraper,
+    "bamboo": bamboo_scraper,
+    "comprehensive": comprehensive_scraper,
+    "talentbrew": talentbrew_scraper,
+}
 
 def load_companies():
     """Load companies from the single companies.yaml file."""
@@ -28,6 +48,8 @@ def load_companies():
             if isinstance(company_data, dict):
                 # e.g. {"greenhouse": [...], "lever": [...]}
                 for source, entries in company_data.items():
+                    if source == RATE_LIMITS_KEY:  # Per-host request rates, see rate_limit.py
+                        continue
                     for entry in entries:
                         entry["source"] = source
                         companies.append(entry)
@@ -41,6 +63,8 @@ def load_companies():
                 company_data = yaml.safe_load(f)
                 if isinstance(company_data, dict):
                     for source, entries in company_data.items():
+                        if source == RATE_LIMITS_KEY:
+                            continue
                         for entry in entries:
                             entry["source"] = source
                             companies.append(entry)
@@ -74,80 +98,99 @@ def get_job_urls():
     
     return urls
 
-# limit to 5 requests per second
-limiter = AsyncLimiter(max_rate=5, time_period=1)
+async def fetch(client, url):
+    # The client's transport paces requests per host (see rate_limit.py)
+    try:
+        response = await client.get(url)
+        if response.status_code == 200:
+            return response.text
+        else:
+            print(f"⚠️ Error {response.status_code} for {url}")
+    except Exception as e:
+        print(f"❌ Request failed for {url}: {e}")
+    return None
+
+async def scrape_all(urls):
+    async with make_client() as client:
+        tasks = [fetch(client, url) for url in urls]
+        return await asyncio.gather(*tasks)
+
+def company_token(entry: Dict) -> str:
+    """Argument of the source scraper's fetch_company_jobs for a companies.yaml entry."""
+    company = entry.get("company")
+    if entry.get("source") == "ycombinator":
+        return company
+    if entry.get("source") == "lever" and "host" in entry:
+        # Extract token from host field (format: jobs.lever.co/TOKEN)
+        host = entry["host"]
+        return host.split("/")[-1] if "/" in host else host
+    return entry.get("token", company)
 
-async def fetch(session, url):
-    async with limiter:  # ensures rate limit
+async def fetch_company(entry: Dict, semaphore: asyncio.Semaphore,
+                        client: httpx.AsyncClient) -> Optional[List[Dict]]:
+    """Jobs of one company, or None when its fetch failed or timed out; [] for sources without a scraper."""
+    source, company = entry.get("source"), entry.get("company")
+    scraper = SCRAPERS.get(source)
+    if scraper is None:
+        return []
+    async with semaphore:
         try:
-            async with session.get(url, timeout=20) as response:
-                if response.status == 200:
-                    return await response.text()
-                else:
-                    print(f"⚠️ Error {response.status} for {url}")
+            return await asyncio.wait_for(scraper.fetch_company_jobs(company_token(entry), client=client),
+                                          settings.INGESTION_COMPANY_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out fetching jobs for {company} ({source}) after {settings.INGESTION_COMPANY_TIMEOUT:.0f} s")
         except Exception as e:
-            print(f"❌ Request failed for {url}: {e}")
-        return None
+            logger.error(f"Error fetching jobs for {company} ({source}): {e}")
+    return None
 
-async def scrape_all(urls):
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch(session, url) for url in urls]
-        return await asyncio.gather(*tasks)
+async def fetch_all_companies(companies: List[Dict]) -> List[Optional[List[Dict]]]:
+    """Fetch every company on one event loop, INGESTION_CONCURRENCY at a time; results follow ``companies``.
+
+    A company that fails or exceeds INGESTION_COMPANY_TIMEOUT yields None
+    and does not affect the others. All scrapers share one pooled HTTP
+    client (see http_client.py).
+    """
+    semaphore = asyncio.Semaphore(settings.INGESTION_CONCURRENCY)
+    async with make_client() as client:
+        return await asyncio.gather(*(fetch_company(entry, semaphore, client) for entry in companies))
 
 def run_ingestion_with_cleanup():
-    """Run job ingestion and clean up obsolete jobs."""
+    """Run job ingestion and clean up obsolete jobs, unless another run holds the ingestion lease."""
     # Initialize database tables
     init_db()
     
+    owner = uuid.uuid4().hex
+    lease = SessionLocal()
+    try:
+        if not acquire_ingestion_lease(lease, owner):
+            print("⏳ Another ingestion run is in progress; try again once it is done")
+            return
+        ingest_with_cleanup()
+    finally:
+        release_ingestion_lease(lease, owner)
+        lease.close()
+
+def ingest_with_cleanup():
+    """Fetch every company, upsert the jobs and delete those no company listed any more."""
     companies = load_companies()
     print(f"Found {len(companies)} companies to ingest")
     db = SessionLocal()
     total_jobs = 0
     all_current_urls = set()  # Track all URLs found in current scraping
     
-    for entry in companies:
-        source = entry.get("source")
+    results = asyncio.run(fetch_all_companies(companies))
+    
+    for entry, jobs in zip(companies, results):
         company = entry.get("company")
-        jobs = []
-        try:
-            if source == "lever":
-                # Extract token from host field (format: jobs.lever.co/TOKEN)
-                if "host" in entry:
-                    host = entry["host"]
-                    company_token = host.split("/")[-1] if "/" in host else host
-                else:
-                    company_token = entry.get("token", company)
-                jobs = asyncio.run(lever_scraper.fetch_company_jobs(company_token))
-            elif source == "greenhouse":
-                company_token = entry.get("token", company)
-                jobs = asyncio.run(greenhouse_scraper.fetch_company_jobs(company_token))
-            elif source == "ycombinator":
-                jobs = asyncio.run(yc_scraper.fetch_company_jobs(company))
-            elif source == "workday":
-                company_token = entry.get("token", company)
-                jobs = asyncio.run(workday_scraper.fetch_company_jobs(company_token))
-            elif source == "angellist":
-                company_token = entry.get("token", company)
-                jobs = asyncio.run(angellist_scraper.fetch_company_jobs(company_token))
-            elif source == "bamboo":
-                company_token = entry.get("token", company)
-                jobs = asyncio.run(bamboo_scraper.fetch_company_jobs(company_token))
-            elif source == "comprehensive":
-                company_token = entry.get("token", company)
-                jobs = asyncio.run(comprehensive_scraper.fetch_company_jobs(company_token))
-            elif source == "talentbrew":
-                company_token = entry.get("token", company)
-                jobs = asyncio.run(talentbrew_scraper.fetch_company_jobs(company_token))
-            # Add more sources here if needed
-        except Exception as e:
-            print(f"❌ Error fetching jobs for {company} ({source}): {e}")
+        if jobs is None:
+            print(f"❌ No jobs fetched for {company} ({entry.get('source')})")
+            continue
         
-        for job in jobs:
-            job["score"] = score_job(job)  # Use default scoring for ingestion
-            upsert_job(db, job)
-            all_current_urls.add(job["url"])
+        counts = bulk_upsert_jobs(db, annotate_jobs(jobs))  # Features + default scoring for ingestion
+        all_current_urls.update(job["url"] for job in jobs)
         
-        print(f"{company}: {len(jobs)} jobs ingested.")
+        print(f"{company}: {len(jobs)} jobs ingested ({counts['inserted']} new, {counts['updated']} updated, "
+              f"{counts['unchanged']} unchanged).")
         total_jobs += len(jobs)
     
     # Clean up obsolete jobs
@@ -157,12 +200,12 @@ def run_ingestion_with_cleanup():
     
     if obsolete_count > 0:
         # Delete obsolete jobs
-        db.query(Job).filter(~Job.url.in_(all_current_urls)).delete(synchronize_session=False)
-        db.commit()
+        delete_jobs(db, ~Job.url.in_(all_current_urls))
         print(f"🗑️  Removed {obsolete_count} obsolete job postings")
     else:
         print("✅ No obsolete jobs found")
     
+    bump_generation(db, run_at=datetime.utcnow())  # Invalidates API ETags issued before this run
     db.close()
     print(f"Total jobs ingested: {total_jobs}")
     print(f"Active jobs in database: {total_jobs}")
@@ -0,0 +1,88 @@
+"""
+Job-type categories offered by the frontend filter panel.
+
+Every job is classified at ingestion time into zero or more job types
+(stored in the ``job_types`` table), so job-type filters are indexed
+equality lookups instead of ``ilike`` scans over titles and descriptions.
+"""
+
+import re
+import zlib
+from typing import Dict, List, Set
+
+from util import job_features, stored_features
+
+# Words matched case-insensitively as whole words of the title and description
+# (plurals too); '_' joins the two words of a phrase
+JOB_TYPE_TERMS: Dict[str, List[str]] = {
+    "research": ["research", "researcher", "scientist", "postdoc", "phd", "investigator", "fellow"],
+    "engineering": ["engineer", "engineering", "developer", "software", "platform", "infrastructure", "backend",
+                    "frontend", "devops", "architect"],
+    "clinical": ["clinical", "clinician", "medical", "physician", "doctor", "nurse", "regulatory", "compliance",
+                 "trial", "study", "studies"],
+    "data science": ["data_scientist", "machine_learning", "ml", "ai", "artificial_intelligence",
+                     "analytics", "statistician", "bioinformatics", "computational"],
+    "management": ["manager", "director", "lead", "head", "chief", "vp", "vice_president", "executive",
+                   "supervisor", "coordinator"],
+    "operations": ["operations", "ops", "analyst", "specialist", "coordinator", "administrator",
+                   "support", "quality", "manufacturing"],
+    "sales": ["sales", "marketing", "business_development", "account", "customer", "client",
+              "commercial", "market"],
+}
+
+# Job types also given to any job with a hit in a scoring keyword tier
+# (see util.KEYWORD_TIERS); "wet lab" comes from util.WET_LAB_KEYWORDS
+JOB_TYPE_TIERS: Dict[str, str] = {
+    "data science": "data_science",
+    "bioinformatics": "primary",
+}
+
+JOB_TYPES = list(dict.fromkeys([*JOB_TYPE_TERMS, *JOB_TYPE_TIERS, "wet lab"]))
+
+# Stored job types classified with other terms are redone at startup (db.backfill_job_types)
+JOB_TYPES_VERSION = zlib.crc32(repr((JOB_TYPE_TERMS, JOB_TYPE_TIERS)).encode())
+
+# Job types of each term
+_TERM_TYPES: Dict[str, Set[str]] = {
+    term: {job_type for job_type, terms in JOB_TYPE_TERMS.items() if term in terms}
+    for terms in JOB_TYPE_TERMS.values() for term in terms
+}
+
+# First words of the two-word phrases
+_PHRASE_STARTS = {term.split("_")[0] for term in _TERM_TYPES if "_" in term}
+
+WORD_RE = re.compile(r"\w+")
+
+
+def _field(job, name: str) -> str:
+    value = job.get(name) if isinstance(job, dict) else getattr(job, name, None)
+    return value or ""
+
+
+def _words(text: str) -> Set[str]:
+    """Lower-cased words of ``text`` and its two-word phrases starting like a term, with plurals also in the singular."""
+    words = WORD_RE.findall(text.lower())
+    found = set(words)
+    found.update(f"{first}_{second}" for first, second in zip(words, words[1:]) if first in _PHRASE_STARTS)
+    found.update([term[:-1] for term in found if term.endswith("s")])
+    return found
+
+
+def classify_job(job) -> List[str]:
+    """Job types of a job (dict or ``Job`` row), in ``JOB_TYPES`` order."""
+    features = stored_features(job) or job_features(job)
+    codes = set()
+    for term in _words(_field(job, "title")).union(_words(_field(job, "description"))).intersection(_TERM_TYPES):
+        codes.update(_TERM_TYPES[term])
+    for job_type, tier in JOB_TYPE_TIERS.items():
+        if features["title"][tier] or features["description"][tier]:
+            codes.add(job_type)
+    if features["wet_lab"]:  # Any util.WET_LAB_KEYWORDS mention
+        codes.add("wet lab")
+    return [job_type for job_type in JOB_TYPES if job_type in codes]
+
+
+def filter_job_types(values: List[str]) -> List[str]:
+    """Known job types among filter values; unknown values select nothing."""
+    wanted = {value.strip().lower() for value in values}
+    return [job_type for job_type in JOB_TYPES if job_type in wanted]
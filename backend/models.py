@@ -16,3 +16,15 @@ class JobOut(JobIn):
     id: int
     posted_at: datetime
     score: Optional[Union[float, None]] = None  # Allow None for when no search query
+
+class JobCard(BaseModel):
+    """Compact job for list views; the full description is served by /api/jobs/{id}."""
+    id: int
+    title: str
+    company: str
+    location: str = ""
+    url: str
+    source: str
+    posted_at: datetime
+    snippet: str = ""
+    score: Optional[float] = None
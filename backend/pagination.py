@@ -0,0 +1,72 @@
+"""
+Keyset cursors for paginating /api/jobs.
+
+A cursor is the (score, posted_at, id) sort key of the last row of a page,
+or the number of rows already served for result orders that have no such
+key (BM25-ranked FTS searches). It is passed around as an opaque
+URL-safe base64 string.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from sqlalchemy import and_, or_
+
+
+class Cursor(NamedTuple):
+    score: Optional[float] = None
+    posted_at: Optional[datetime] = None
+    id: Optional[int] = None
+    offset: Optional[int] = None
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    payload = {
+        "s": cursor.score,
+        "p": cursor.posted_at.isoformat() if cursor.posted_at else None,
+        "i": cursor.id,
+        "o": cursor.offset,
+    }
+    raw = json.dumps({k: v for k, v in payload.items() if v is not None}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Parse a cursor produced by ``encode_cursor``; raises ValueError when malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        posted_at = payload.get("p")
+        cursor = Cursor(
+            score=float(payload["s"]) if payload.get("s") is not None else None,
+            posted_at=datetime.fromisoformat(posted_at) if posted_at else None,
+            id=int(payload["i"]) if payload.get("i") is not None else None,
+            offset=int(payload["o"]) if payload.get("o") is not None else None,
+        )
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        raise ValueError(f"invalid cursor: {e}") from e
+    if cursor.offset is not None and cursor.offset < 0:
+        raise ValueError("invalid cursor: negative offset")
+    return cursor
+
+
+def sort_key(score: Optional[float], posted_at: Optional[datetime], job_id: int):
+    """Descending sort key shared by in-memory rankings and cursors."""
+    return (score or 0.0, posted_at or datetime.min, job_id)
+
+
+def after_cursor(model, cursor: Cursor):
+    """SQL condition for rows after ``cursor`` in (posted_at DESC, id DESC) order.
+
+    Matches ``order_by(posted_at.desc().nulls_last(), id.desc())``, so rows
+    without a posting date come last.
+    """
+    if cursor.posted_at is None:
+        return and_(model.posted_at.is_(None), model.id < cursor.id)
+    return or_(
+        model.posted_at < cursor.posted_at,
+        and_(model.posted_at == cursor.posted_at, model.id < cursor.id),
+        model.posted_at.is_(None),
+    )
@@ -0,0 +1,167 @@
+"""
+Per-host politeness for the scrapers' HTTP client.
+
+Requests to each host are spaced to its configured rate: the
+``rate_limits`` section of companies.yaml or the RATE_LIMITS setting, and
+RATE_LIMIT_DEFAULT for other hosts. A ``*.domain`` entry gives all of its
+subdomains one shared budget. When a host answers 429 or 503, its rate is
+halved, it is paused for its Retry-After and the request is retried. A
+Retry-After longer than RATE_LIMIT_MAX_WAIT is not waited for: the host's
+requests get a 503 at once until it runs out, so the companies behind them
+fail instead of sleeping past INGESTION_COMPANY_TIMEOUT. Every
+other answer raises the rate again by a twentieth of the configured one,
+so each host runs near the highest rate it accepts (additive increase,
+multiplicative decrease).
+
+Every client made by http_client.make_client sends through
+RateLimitedTransport, so every scraper is covered.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
+import yaml
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+COMPANIES_FILE = Path(__file__).parent / "companies.yaml"
+RATE_LIMITS_KEY = "rate_limits"  # companies.yaml section of {host or "*.domain": requests per second}
+THROTTLED_STATUSES = (429, 503)
+RECOVERY_STEPS = 20  # Unthrottled answers taking a host from RATE_LIMIT_MIN back to its configured rate
+
+
+@lru_cache(maxsize=1)
+def _file_rates() -> Dict[str, float]:
+    try:
+        with open(COMPANIES_FILE, 'r') as f:
+            return dict((yaml.safe_load(f) or {}).get(RATE_LIMITS_KEY) or {})
+    except (OSError, yaml.YAMLError) as e:
+        logger.warning(f"No rate limits loaded from {COMPANIES_FILE.name}: {e}")
+        return {}
+
+
+def configured_rates() -> Dict[str, float]:
+    """Requests per second per host pattern: companies.yaml ``rate_limits``, overridden by settings.RATE_LIMITS."""
+    rates = {**_file_rates(), **settings.RATE_LIMITS}
+    return {pattern: float(rate) for pattern, rate in rates.items()}
+
+
+def host_key(host: str, rates: Dict[str, float]) -> str:
+    """Key of the limiter ``host`` shares: the host, or the ``*.domain`` pattern of ``rates`` covering it."""
+    if host in rates:
+        return host
+    for pattern in rates:
+        if pattern.startswith("*.") and host.endswith(pattern[1:]):
+            return pattern
+    return host
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delay in seconds or HTTP date), None if missing or invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class HostLimiter:
+    """Request slots of one host (or ``*.domain`` pattern), spaced by its current rate."""
+
+    def __init__(self, rate: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.next_slot = 0.0
+        self.paused_until = 0.0
+        self.blocked_until = 0.0
+
+    async def wait(self) -> None:
+        """Wait for the next free slot; a pause set meanwhile (Retry-After) pushes the request past it.
+
+        Returns at once while the host is blocked (see ``blocked_for``).
+        """
+        while not self.blocked_for():
+            now = time.monotonic()
+            slot = max(now, self.next_slot, self.paused_until)
+            self.next_slot = slot + 1 / self.rate
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            if time.monotonic() >= self.paused_until:
+                return
+
+    def blocked_for(self) -> float:
+        """Seconds left of a Retry-After longer than RATE_LIMIT_MAX_WAIT, 0 when the host is not blocked."""
+        return max(0.0, self.blocked_until - time.monotonic())
+
+    def throttled(self, retry_after: Optional[float]) -> None:
+        self.rate = max(min(settings.RATE_LIMIT_MIN, self.max_rate), self.rate / 2)
+        pause = retry_after if retry_after is not None else 1 / self.rate
+        now = time.monotonic()
+        if pause > settings.RATE_LIMIT_MAX_WAIT:
+            self.blocked_until = max(self.blocked_until, now + pause)
+        self.paused_until = max(self.paused_until, now + min(pause, settings.RATE_LIMIT_MAX_WAIT))
+
+    def succeeded(self) -> None:
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / RECOVERY_STEPS)
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """Transport holding each request until its host has a free slot, and retrying throttled ones."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, rates: Optional[Dict[str, float]] = None):
+        self.transport = transport
+        self.rates = configured_rates() if rates is None else rates
+        self.limiters: Dict[str, HostLimiter] = {}
+
+    def limiter(self, host: str) -> HostLimiter:
+        key = host_key(host, self.rates)
+        if key not in self.limiters:
+            self.limiters[key] = HostLimiter(self.rates.get(key, settings.RATE_LIMIT_DEFAULT))
+        return self.limiters[key]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        limiter = self.limiter(host)
+        for attempt in range(settings.RATE_LIMIT_MAX_RETRIES + 1):
+            await limiter.wait()
+            blocked = limiter.blocked_for()
+            if blocked:
+                # Answered here, as the host would, rather than after sleeping through its Retry-After
+                return httpx.Response(503, headers={"Retry-After": str(math.ceil(blocked))}, request=request)
+            response = await self.transport.handle_async_request(request)
+            if response.status_code not in THROTTLED_STATUSES:
+                limiter.succeeded()
+                return response
+            retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+            limiter.throttled(retry_after)
+            if (retry_after or 0) > settings.RATE_LIMIT_MAX_WAIT:
+                logger.warning(f"{host} answered {response.status_code} with Retry-After {retry_after:.0f}s; "
+                               f"its requests fail until then")
+                break
+            if attempt == settings.RATE_LIMIT_MAX_RETRIES:
+                break
+            await response.aclose()
+            logger.info(f"{host} answered {response.status_code}, retrying at {limiter.rate:.2f} requests/s")
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -0,0 +1,102 @@
+"""
+Canonical metro regions for job locations.
+
+Every ``Job.location`` is normalized at ingestion time into zero or more
+region codes (stored in the ``job_regions`` table), so location filters are
+indexed equality lookups instead of ``ilike`` scans.
+"""
+
+import re
+import zlib
+from typing import Dict, List, NamedTuple, Optional
+
+
+class Region(NamedTuple):
+    label: str
+    pattern: "re.Pattern"
+
+
+def _region(label: str, *patterns: str) -> Region:
+    return Region(label, re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE))
+
+
+# Patterns match whole words in any case; state abbreviations only count after a comma
+REGIONS: Dict[str, Region] = {
+    "remote": _region(
+        "Remote",
+        r"\bremote\b", r"\banywhere\b", r"\bwork from home\b", r"\bwfh\b",
+    ),
+    "bay_area": _region(
+        "San Francisco Bay Area",
+        r"\bsan francisco\b", r"\bsf\b", r"\bbay area\b", r"\bsilicon valley\b", r"\bpalo alto\b",
+        r"\bmountain view\b", r"\bcupertino\b", r"\bsunnyvale\b", r"\bredwood city\b", r"\bmenlo park\b",
+        r"\bfremont\b", r"\boakland\b", r"\bberkeley\b", r"\bemeryville\b", r"\bsan jose\b",
+        r"\bsanta clara\b", r"\bsan mateo\b", r"\bfoster city\b", r"\bsan carlos\b", r"\bhayward\b",
+        r"\balameda\b", r"\bnovato\b",
+    ),
+    "boston": _region(
+        "Boston/Cambridge",
+        r"\bboston\b", r"\bcambridge\b(?!,?\s*(?:uk|united kingdom|england)\b)", r"\bmassachusetts\b",
+        r",\s*ma\b", r"\bwaltham\b", r"\bwatertown\b", r"\bsomerville\b", r"\bwoburn\b",
+    ),
+    "nyc": _region(
+        "New York City",
+        r"\bnew york\b", r"\bnyc\b", r"\bmanhattan\b", r"\bbrooklyn\b", r"\bqueens\b", r",\s*ny\b",
+    ),
+    "seattle": _region(
+        "Seattle",
+        r"\bseattle\b", r"\bbellevue\b", r"\bredmond\b", r"\bbothell\b", r"\bkirkland\b",
+        r"\bwashington\b(?!,?\s*d\.?\s*c\b)", r",\s*wa\b",
+    ),
+    "los_angeles": _region(
+        "Los Angeles",
+        r"\blos angeles\b", r"\bsanta monica\b", r"\bpasadena\b", r"\bculver city\b", r"\bel segundo\b",
+        r"\bthousand oaks\b", r"\bburbank\b",
+    ),
+    "san_diego": _region(
+        "San Diego",
+        r"\bsan diego\b", r"\bla jolla\b", r"\bcarlsbad\b", r"\btorrey pines\b",
+    ),
+    "chicago": _region(
+        "Chicago",
+        r"\bchicago\b", r"\bevanston\b",
+    ),
+    "washington_dc": _region(
+        "Washington DC",
+        r"\bwashington,?\s*d\.?\s*c\b", r"\bdc\b", r"\bbethesda\b", r"\brockville\b", r"\bgaithersburg\b",
+        r"\barlington,\s*va\b",
+    ),
+}
+
+# Lower-cased label -> code, so filters accept the labels shown to users
+# Stored regions tagged with other patterns are redone at startup (db.backfill_regions)
+REGIONS_VERSION = zlib.crc32(repr([(code, region.label, region.pattern.pattern) for code, region in REGIONS.items()]).encode())
+
+_CODES_BY_LABEL = {region.label.lower(): code for code, region in REGIONS.items()}
+
+
+def location_regions(location: Optional[str]) -> List[str]:
+    """Region codes a free-text job location belongs to, in ``REGIONS`` order."""
+    if not location:
+        return []
+    return [code for code, region in REGIONS.items() if region.pattern.search(location)]
+
+
+def filter_regions(value: str) -> List[str]:
+    """Region codes selected by a location filter value.
+
+    Accepts region codes, region labels and any place name the region
+    patterns recognize (e.g. 'boston', 'new york'). Returns an empty list
+    for values that are not a known region.
+    """
+    value = value.strip().lower()
+    if value in REGIONS:
+        return [value]
+    if value in _CODES_BY_LABEL:
+        return [_CODES_BY_LABEL[value]]
+    return location_regions(value)
+
+
+def region_label(code: str) -> str:
+    region = REGIONS.get(code)
+    return region.label if region else code
@@ -1,85 +1,152 @@
 import asyncio
+from datetime import datetime
 import logging
+import os
+import tempfile
+import uuid
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from db import SessionLocal, upsert_job, init_db, Job
-from ingestor import load_companies
-from scrapers import lever as lever_scraper
-from scrapers import greenhouse as greenhouse_scraper
-from scrapers import ycombinator as yc_scraper
-from scrapers import workday as workday_scraper
-from scrapers import angellist as angellist_scraper
-from scrapers import bamboo as bamboo_scraper
-from util import score_job
+from sqlalchemy.engine import make_url
+from db import SessionLocal, engine, bulk_upsert_jobs, init_db, Job, delete_jobs, bump_generation, acquire_ingestion_lease, release_ingestion_lease
+from ingestor import load_companies, fetch_all_companies
+from util import annotate_jobs
+from search_index import search_index
+from facets import facet_index
+from settings import settings
+from staging import StagedCorpus, swap_supported
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows: every process starts its own scheduler there
+    fcntl = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def run_job_ingestion():
-    """Run job ingestion for all companies in the background with cleanup."""
+    """Run job ingestion for all companies in the background with cleanup.
+
+    With INGESTION_MODE "swap" the run is staged and swapped in at the end
+    (see staging.py); readers keep the previous corpus until then, except
+    on databases that cannot swap, which are upserted into. The run is
+    skipped while another one (another process, the standalone
+    ingestor) holds the ingestion lease.
+    """
+    owner = uuid.uuid4().hex
+    lease = SessionLocal()
+    if not acquire_ingestion_lease(lease, owner):
+        logger.info("Another ingestion run holds the lease; skipping this one")
+        lease.close()
+        return
+    staged = None
+    if settings.INGESTION_MODE == "swap":
+        if swap_supported():
+            staged = StagedCorpus()
+        else:
+            logger.info(f"Swap ingestion needs SQLite; upserting into the live {engine.dialect.name} tables instead")
+    db = SessionLocal()
     try:
         logger.info("Starting scheduled job ingestion...")
         companies = load_companies()
-        db = SessionLocal()
+        if staged is not None:
+            staged.create()
         total_jobs = 0
         all_current_urls = set()  # Track all URLs found in current scraping
         
-        for entry in companies:
-            source = entry.get("source")
+        # All companies are fetched concurrently; failed or timed-out ones come back as None
+        results = asyncio.run(fetch_all_companies(companies))
+        
+        for entry, jobs in zip(companies, results):
             company = entry.get("company")
-            jobs = []
-            
-            try:
-                if source == "lever":
-                    company_token = entry.get("token", company)
-                    jobs = asyncio.run(lever_scraper.fetch_company_jobs(company_token))
-                elif source == "greenhouse":
-                    company_token = entry.get("token", company)
-                    jobs = asyncio.run(greenhouse_scraper.fetch_company_jobs(company_token))
-                elif source == "ycombinator":
-                    jobs = asyncio.run(yc_scraper.fetch_company_jobs(company))
-                elif source == "workday":
-                    company_token = entry.get("token", company)
-                    jobs = asyncio.run(workday_scraper.fetch_company_jobs(company_token))
-                elif source == "angellist":
-                    company_token = entry.get("token", company)
-                    jobs = asyncio.run(angellist_scraper.fetch_company_jobs(company_token))
-                elif source == "bamboo":
-                    company_token = entry.get("token", company)
-                    jobs = asyncio.run(bamboo_scraper.fetch_company_jobs(company_token))
-            except Exception as e:
-                logger.error(f"Error fetching jobs for {company} ({source}): {e}")
+            if jobs is None:
                 continue
             
-            for job in jobs:
-                job["score"] = score_job(job)  # Use default scoring for scheduled ingestion
-                upsert_job(db, job)
-                all_current_urls.add(job["url"])
-            
-            logger.info(f"{company}: {len(jobs)} jobs processed.")
+            jobs = annotate_jobs(jobs)  # Features + default scoring for scheduled ingestion
+            if staged is not None:
+                staged.add(jobs)
+                logger.info(f"{company}: {len(jobs)} jobs processed.")
+            else:
+                counts = bulk_upsert_jobs(db, jobs)
+                logger.info(f"{company}: {len(jobs)} jobs processed ({counts['inserted']} new, "
+                            f"{counts['updated']} updated, {counts['unchanged']} unchanged).")
+            all_current_urls.update(job["url"] for job in jobs)
             total_jobs += len(jobs)
         
-        # Clean up obsolete jobs
-        logger.info("Cleaning up obsolete job postings...")
-        obsolete_count = db.query(Job).filter(~Job.url.in_(all_current_urls)).count()
-        
-        if obsolete_count > 0:
-            # Delete obsolete jobs
-            db.query(Job).filter(~Job.url.in_(all_current_urls)).delete(synchronize_session=False)
-            db.commit()
-            logger.info(f"Removed {obsolete_count} obsolete job postings")
+        if staged is not None:
+            # The staged corpus replaces the live one, so jobs this run did not fetch are gone with it
+            logger.info(f"Swapped in {staged.swap()} staged jobs")
         else:
-            logger.info("No obsolete jobs found")
+            # Clean up obsolete jobs
+            logger.info("Cleaning up obsolete job postings...")
+            obsolete_count = db.query(Job).filter(~Job.url.in_(all_current_urls)).count()
+            
+            if obsolete_count > 0:
+                # Delete obsolete jobs
+                delete_jobs(db, ~Job.url.in_(all_current_urls))
+                logger.info(f"Removed {obsolete_count} obsolete job postings")
+            else:
+                logger.info("No obsolete jobs found")
+        
+        # Sync the API's in-memory search index with this run, before the new generation is announced
+        index_changes = search_index.refresh(db)
+        logger.info(f"Search index refreshed: {index_changes['indexed']} indexed, {index_changes['removed']} removed")
+        facet_index.refresh(db)
+        
+        # New generation: read endpoints stop answering 304 to copies from before this run,
+        # and the API workers that did not run it refresh their indexes
+        bump_generation(db, run_at=datetime.utcnow())
         
-        db.close()
         logger.info(f"Scheduled ingestion completed. Total jobs processed: {total_jobs}")
         
     except Exception as e:
         logger.error(f"Error during scheduled job ingestion: {e}")
+        if staged is not None:
+            staged.discard()
+    finally:
+        db.close()
+        release_ingestion_lease(lease, owner)
+        lease.close()
+
+# Lock file held by the process running the scheduler, if this is the one
+_scheduler_lock = None
+
+def _scheduler_lock_path():
+    """SCHEDULER_LOCK_FILE, by default next to the SQLite database so each database gets one scheduler."""
+    if settings.SCHEDULER_LOCK_FILE:
+        return settings.SCHEDULER_LOCK_FILE
+    url = make_url(settings.DATABASE_URL)
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        return url.database + ".scheduler.lock"
+    return os.path.join(tempfile.gettempdir(), "biodsjobs-scheduler.lock")
+
+def _take_scheduler_lock():
+    """Whether this process may run the scheduler: only one per host holds SCHEDULER_LOCK_FILE.
+
+    The lock goes with the process, so the worker gunicorn starts in place
+    of a dead holder takes it over.
+    """
+    global _scheduler_lock
+    if fcntl is None:
+        return True
+    lock = open(_scheduler_lock_path(), "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return False
+    _scheduler_lock = lock
+    return True
 
 def start_scheduler():
-    """Start the background scheduler for automatic job updates."""
+    """Start the background scheduler for automatic job updates, in one process per host.
+
+    Returns None in the other processes (gunicorn workers), which pick up
+    each run's data through the ingestion generation.
+    """
+    if not _take_scheduler_lock():
+        logger.info("Job scheduler runs in another process")
+        return None
     scheduler = BackgroundScheduler()
     
     # Schedule job ingestion every 4 hours
@@ -97,6 +164,10 @@ def start_scheduler():
 
 def stop_scheduler(scheduler):
     """Stop the background scheduler."""
+    global _scheduler_lock
     if scheduler:
         scheduler.shutdown()
         logger.info("Job scheduler stopped")
+    if _scheduler_lock is not None:
+        _scheduler_lock.close()  # Releases the lock
+        _scheduler_lock = None
@@ -1,9 +1,10 @@
 import httpx
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 from bs4 import BeautifulSoup
+from http_client import use_client
 
-async def fetch_company_jobs(company_token: str) -> List[Dict]:
+async def fetch_company_jobs(company_token: str, client: Optional[httpx.AsyncClient] = None) -> List[Dict]:
     """Fetch jobs from BambooHR for companies that use this platform."""
     
     # Map company tokens to their BambooHR career pages
@@ -19,7 +20,7 @@ async def fetch_company_jobs(company_token: str) -> List[Dict]:
         return []
     
     try:
-        async with httpx.AsyncClient(timeout=20) as client:
+        async with use_client(client) as client:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
@@ -8,7 +8,7 @@ import httpx
 import re
 import sys
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 from bs4 import BeautifulSoup
 import json
@@ -65,7 +65,7 @@ def parse_workday_jobs(jobs_data: List[Dict], company_name: str, base_url: str)
     
     return jobs
 
-async def fetch_company_jobs(company_token: str) -> List[Dict[str, Any]]:
+async def fetch_company_jobs(company_token: str, client: Optional[httpx.AsyncClient] = None) -> List[Dict[str, Any]]:
     """
     Fetch jobs from companies using comprehensive scraping strategies.
     Now enhanced with advanced scraping techniques.
@@ -119,7 +119,8 @@ async def fetch_company_jobs(company_token: str) -> List[Dict[str, Any]]:
     advanced_scraper = AdvancedScraper()
     jobs = await advanced_scraper.scrape_company_advanced(
         company_info['name'], 
-        company_info['careers_url']
+        company_info['careers_url'],
+        client=client
     )
     
     return jobs
@@ -1,13 +1,14 @@
 import httpx
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
+from http_client import use_client
 
-async def fetch_company_jobs(company: str) -> List[Dict]:
+async def fetch_company_jobs(company: str, client: Optional[httpx.AsyncClient] = None) -> List[Dict]:
     """Fetch jobs from Greenhouse for a given company board token.
     Public JSON endpoint: https://boards-api.greenhouse.io/v1/boards/{company}/jobs
     """
     url = f"https://boards-api.greenhouse.io/v1/boards/{company}/jobs?content=true"
-    async with httpx.AsyncClient(timeout=20) as client:
+    async with use_client(client) as client:
         r = await client.get(url)
         r.raise_for_status()
         data = r.json()
@@ -1,13 +1,14 @@
 import httpx
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
+from http_client import use_client
 
-async def fetch_company_jobs(company: str) -> List[Dict]:
+async def fetch_company_jobs(company: str, client: Optional[httpx.AsyncClient] = None) -> List[Dict]:
     """Fetch jobs from Lever for a given company handle.
     Public JSON endpoint: https://api.lever.co/v0/postings/{company}?mode=json
     """
     url = f"https://api.lever.co/v0/postings/{company}?mode=json"
-    async with httpx.AsyncClient(timeout=20) as client:
+    async with use_client(client) as client:
         r = await client.get(url)
         r.raise_for_status()
         data = r.json()
@@ -5,12 +5,13 @@ TalentBrew/PhenomPeople scraper for companies using TalentBrew ATS platform.
 import asyncio
 import httpx
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 from bs4 import BeautifulSoup
 import json
+from http_client import use_client
 
-async def fetch_company_jobs(company_token: str) -> List[Dict[str, Any]]:
+async def fetch_company_jobs(company_token: str, client: Optional[httpx.AsyncClient] = None) -> List[Dict[str, Any]]:
     """
     Fetch jobs from TalentBrew/PhenomPeople career sites.
     """
@@ -38,7 +39,7 @@ async def fetch_company_jobs(company_token: str) -> List[Dict[str, Any]]:
     jobs = []
     
     try:
-        async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
+        async with use_client(client) as client:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
                 'Accept': 'application/json, text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -8,7 +8,7 @@ import re
 import json
 import sys
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 from bs4 import BeautifulSoup
 
@@ -69,7 +69,7 @@ def parse_workday_jobs(jobs_data: List[Dict], company_name: str, base_url: str)
     
     return jobs
 
-async def fetch_company_jobs(company_token: str) -> List[Dict[str, Any]]:
+async def fetch_company_jobs(company_token: str, client: Optional[httpx.AsyncClient] = None) -> List[Dict[str, Any]]:
     """
     Fetch jobs from Workday career sites.
     """
@@ -159,7 +159,8 @@ async def fetch_company_jobs(company_token: str) -> List[Dict[str, Any]]:
     advanced_scraper = AdvancedScraper()
     jobs = await advanced_scraper.scrape_company_advanced(
         company_info['company_name'], 
-        company_info['url']
+        company_info['url'],
+        client=client
     )
     
     return jobs
@@ -1,9 +1,10 @@
 import httpx
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 import json
+from http_client import use_client
 
-async def fetch_company_jobs(company: str) -> List[Dict]:
+async def fetch_company_jobs(company: str, client: Optional[httpx.AsyncClient] = None) -> List[Dict]:
     """Fetch jobs from Work at a Startup (YC's job board) for YC biotech companies."""
     
     # Y Combinator biotech companies
@@ -21,7 +22,7 @@ async def fetch_company_jobs(company: str) -> List[Dict]:
         # YC's Work at a Startup API endpoint
         url = "https://www.workatastartup.com/api/v1/jobs"
         
-        async with httpx.AsyncClient(timeout=20) as client:
+        async with use_client(client) as client:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
                 'Accept': 'application/json'
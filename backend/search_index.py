@@ -0,0 +1,301 @@
+"""
+In-process inverted index for /api/jobs searches.
+
+Maps every lower-cased word of a job's title, description and company to a
+compact posting list: an ``array`` of document numbers and one of title,
+description and company occurrence counts, a few bytes per entry. Query
+terms match inside words (the partial-word matching ``score_job``
+rewards); the words containing a term are found through a trigram
+dictionary rather than a scan of the whole vocabulary. A search keeps the
+jobs where every query term occurs inside some word, scores all of them
+with ``score_jobs`` semantics and returns the best ``limit`` through a
+bounded heap.
+
+Posting lists are append-only. Re-indexing a job gives it a new document
+number and leaves its old entries dead; once dead entries make up
+COMPACT_RATIO of the index, the posting lists are rewritten without them.
+"""
+
+import heapq
+import threading
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from cache import score_cache
+from db import Job
+from pagination import sort_key
+from util import _field, content_hash, job_features, stored_features
+
+# Occurrence counts per posting entry, in this order: (title, description, company)
+TITLE, DESCRIPTION, COMPANY = range(3)
+FIELDS = 3
+MAX_COUNT = 0xFFFF  # Counts are stored as unsigned shorts
+
+GRAM = 3  # Words are found through their trigrams; shorter words are their own gram
+COMPACT_RATIO = 0.25  # Share of dead document numbers that triggers a compaction
+
+REFRESH_BATCH_SIZE = 500
+
+
+class IndexedJob(NamedTuple):
+    signature: Tuple  # (content hash, company, posted_at); re-indexed when it changes
+    features: Dict
+    posted_at: datetime
+    doc: int  # Document number of its current posting entries
+
+
+class Posting(NamedTuple):
+    """Entries of one word: document numbers, and FIELDS counts per entry."""
+    docs: array
+    counts: array
+
+    @classmethod
+    def empty(cls) -> "Posting":
+        return cls(array("i"), array("H"))
+
+
+def _signature(content_hash: Optional[str], company: Optional[str], posted_at: Optional[datetime]) -> Tuple:
+    return (content_hash, company or '', posted_at)
+
+
+def _query_terms(search_query: str) -> List[str]:
+    # Same tokenization as the query-term component of score_job
+    return [term.strip().lower() for term in search_query.split() if term.strip()]
+
+
+def _grams(word: str) -> Set[str]:
+    if len(word) <= GRAM:
+        return {word}
+    return {word[i:i + GRAM] for i in range(len(word) - GRAM + 1)}
+
+
+class SearchIndex:
+    """Inverted index over the ``jobs`` table, kept in memory by the API process."""
+
+    def __init__(self):
+        self.words: List[str] = []  # Word of each word number
+        self.word_numbers: Dict[str, int] = {}
+        self.postings: List[Posting] = []  # By word number
+        self.grams: Dict[str, array] = {}  # Gram -> numbers of the words containing it
+        self.doc_jobs = array("q")  # Job id of each document number
+        self.live = bytearray()  # Whether each document number is a job's current one
+        self.dead = 0
+        self.jobs: Dict[int, IndexedJob] = {}
+        self.ready = False
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def build(self, session: Session) -> int:
+        """(Re)build the index from every row of the jobs table."""
+        with self._lock:
+            self._reset()
+            for row in session.query(Job).yield_per(REFRESH_BATCH_SIZE):
+                self._add(row)
+            self.ready = True
+            return len(self.jobs)
+
+    def refresh(self, session: Session) -> Dict[str, int]:
+        """Bring the index up to date after an ingestion run.
+
+        Only (id, content hash, company, posted_at) of every row is read;
+        rows that are new or whose signature changed are loaded and
+        re-indexed, ids that disappeared are dropped.
+        """
+        if not self.ready:
+            return {"indexed": 0, "removed": 0}
+        current = {
+            job_id: _signature(job_hash, company, posted_at)
+            for job_id, job_hash, company, posted_at in session.query(Job.id, Job.content_hash, Job.company, Job.posted_at)
+        }
+        with self._lock:
+            removed = [job_id for job_id in self.jobs if job_id not in current]
+            changed = [job_id for job_id, signature in current.items()
+                       if job_id not in self.jobs or self.jobs[job_id].signature != signature]
+        for start in range(0, len(changed), REFRESH_BATCH_SIZE):
+            self.update(session.query(Job).filter(Job.id.in_(changed[start:start + REFRESH_BATCH_SIZE])))
+        self.remove(removed)
+        return {"indexed": len(changed), "removed": len(removed)}
+
+    def update(self, rows: Iterable[Job]) -> None:
+        """Index new rows or re-index changed ones."""
+        if not self.ready:
+            return
+        with self._lock:
+            for row in rows:
+                self._remove(row.id)
+                self._add(row)
+            self._compact_if_needed()
+
+    def remove(self, job_ids: Iterable[int]) -> None:
+        with self._lock:
+            for job_id in job_ids:
+                self._remove(job_id)
+            self._compact_if_needed()
+
+    def _reset(self) -> None:
+        self.words, self.word_numbers, self.postings, self.grams = [], {}, [], {}
+        self.doc_jobs, self.live, self.dead = array("q"), bytearray(), 0
+        self.jobs = {}
+
+    def _posting(self, word: str) -> Posting:
+        number = self.word_numbers.get(word)
+        if number is None:
+            number = self.word_numbers[word] = len(self.words)
+            self.words.append(word)
+            self.postings.append(Posting.empty())
+            for gram in _grams(word):
+                self.grams.setdefault(gram, array("i")).append(number)
+        return self.postings[number]
+
+    def _add(self, row: Job) -> None:
+        doc = len(self.doc_jobs)
+        self.doc_jobs.append(row.id)
+        self.live.append(1)
+        counts: Dict[str, List[int]] = {}
+        fields = (_field(row, 'title'), _field(row, 'description'), _field(row, 'company'))
+        for slot, text in enumerate(fields):
+            for word in text.split():
+                counts.setdefault(word, [0] * FIELDS)[slot] += 1
+        for word, word_counts in counts.items():
+            posting = self._posting(word)
+            posting.docs.append(doc)
+            posting.counts.extend(min(count, MAX_COUNT) for count in word_counts)
+        self.jobs[row.id] = IndexedJob(
+            signature=_signature(row.content_hash or content_hash(row), row.company, row.posted_at),
+            features=stored_features(row) or job_features(row),
+            posted_at=row.posted_at or datetime.min,
+            doc=doc,
+        )
+
+    def _remove(self, job_id: int) -> None:
+        indexed = self.jobs.pop(job_id, None)
+        if indexed is not None:
+            self.live[indexed.doc] = 0
+            self.dead += 1
+
+    def _compact_if_needed(self) -> None:
+        if self.dead > COMPACT_RATIO * len(self.doc_jobs):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the posting lists without dead entries, renumbering documents and dropping unused words."""
+        renumbered = array("i", [-1]) * len(self.doc_jobs)
+        doc_jobs = array("q")
+        for doc, job_id in enumerate(self.doc_jobs):
+            if self.live[doc]:
+                renumbered[doc] = len(doc_jobs)
+                doc_jobs.append(job_id)
+        words, postings = self.words, self.postings
+        self.words, self.word_numbers, self.postings, self.grams = [], {}, [], {}
+        for word, posting in zip(words, postings):
+            kept = [i for i, doc in enumerate(posting.docs) if renumbered[doc] >= 0]
+            if not kept:
+                continue
+            compacted = self._posting(word)
+            compacted.docs.extend(renumbered[posting.docs[i]] for i in kept)
+            for i in kept:
+                compacted.counts.extend(posting.counts[i * FIELDS:(i + 1) * FIELDS])
+        self.jobs = {job_id: indexed._replace(doc=renumbered[indexed.doc]) for job_id, indexed in self.jobs.items()}
+        self.doc_jobs, self.live, self.dead = doc_jobs, bytearray(b"\x01") * len(doc_jobs), 0
+
+    def _words_containing(self, term: str) -> List[int]:
+        """Numbers of the words ``term`` occurs in, from the gram dictionary."""
+        if len(term) >= GRAM:
+            numbers = []
+            for gram in _grams(term):
+                found = self.grams.get(gram)
+                if found is None:
+                    return []
+                numbers.append(found)
+            # Words holding the rarest gram of the term, checked for the whole term
+            return [number for number in min(numbers, key=len) if term in self.words[number]]
+        # A shorter term occurs in a word exactly when it occurs in one of its grams
+        found: Set[int] = set()
+        for gram, numbers in self.grams.items():
+            if term in gram:
+                found.update(numbers)
+        return list(found)
+
+    def _matching_docs(self, terms: Iterable[str], docs: Optional[Set[int]] = None) -> Tuple[Set[int], Dict[str, List[int]]]:
+        """Live documents where every term occurs in some word (within ``docs`` if given), and the words per term."""
+        matched_words: Dict[str, List[int]] = {}
+        for term in dict.fromkeys(terms):
+            numbers = matched_words[term] = self._words_containing(term)
+            holders: Set[int] = set()
+            for number in numbers:
+                holders.update(self.postings[number].docs)
+            docs = holders if docs is None else docs & holders
+            if not docs:
+                return set(), matched_words
+        live = self.live
+        return {doc for doc in docs or () if live[doc]}, matched_words
+
+    def match(self, search_query: str) -> Set[int]:
+        """Ids of the jobs a search matches, without scoring them."""
+        terms = _query_terms(search_query)
+        if not terms:
+            return set()
+        with self._lock:
+            docs, _ = self._matching_docs(terms)
+            return {self.doc_jobs[doc] for doc in docs}
+
+    def search(self, search_query: str, limit: int, allowed: Optional[Set[int]] = None,
+               after: Optional[Tuple] = None) -> Tuple[List[Tuple[int, float, datetime]], int]:
+        """Best ``limit`` (job id, score, posted_at) for a search and the number of matches.
+
+        Every query term must occur in a word of the title, description or
+        company of a job. ``allowed`` restricts the result to those ids
+        (e.g. the rows left by the source/location/date filters). Results
+        are ordered by ``pagination.sort_key`` (score, then most recent
+        ``posted_at``, then id); ``after`` skips every result up to and
+        including that key, for the following pages.
+        """
+        terms = _query_terms(search_query)
+        if not terms or limit <= 0:
+            return [], 0
+        with self._lock:
+            allowed_docs = None if allowed is None else {
+                self.jobs[job_id].doc for job_id in allowed if job_id in self.jobs
+            }
+            candidates, matched_words = self._matching_docs(terms, allowed_docs)
+            if not candidates:
+                return [], 0
+
+            # Vocabulary restricted to the matched words scores like the full one
+            candidate_docs = list(candidates)
+            vocabularies = {doc: {'title': {}, 'description': {}} for doc in candidate_docs}
+            for number in {number for numbers in matched_words.values() for number in numbers}:
+                word, posting = self.words[number], self.postings[number]
+                title_counts, description_counts = posting.counts[TITLE::FIELDS], posting.counts[DESCRIPTION::FIELDS]
+                for doc, title_count, description_count in zip(posting.docs, title_counts, description_counts):
+                    vocabulary = vocabularies.get(doc)
+                    if vocabulary is None:
+                        continue
+                    if title_count:
+                        vocabulary['title'][word] = title_count
+                    if description_count:
+                        vocabulary['description'][word] = description_count
+            candidate_ids = [self.doc_jobs[doc] for doc in candidate_docs]
+            scored_jobs = [{
+                'content_hash': self.jobs[job_id].signature[0],
+                'features': self.jobs[job_id].features,
+                'vocabulary': vocabularies[doc],
+            } for doc, job_id in zip(candidate_docs, candidate_ids)]
+            posted = [self.jobs[job_id].posted_at for job_id in candidate_ids]
+
+        scores = score_cache.score(scored_jobs, search_query)
+        keys = [sort_key(scores[i], posted[i], job_id) for i, job_id in enumerate(candidate_ids)]
+        remaining = range(len(candidate_ids)) if after is None else (i for i, key in enumerate(keys) if key < after)
+        best = heapq.nlargest(limit, remaining, key=keys.__getitem__)
+        return [(candidate_ids[i], float(scores[i]), posted[i]) for i in best], len(candidate_ids)
+
+    def stats(self) -> Dict[str, int]:
+        return {"jobs": len(self.jobs), "terms": len(self.words), "dead": self.dead, "ready": self.ready}
+
+
+search_index = SearchIndex()
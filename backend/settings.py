@@ -1,8 +1,77 @@
+from typing import Dict, Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./biodsjobs.db"
+    # Database URL of the async endpoints; empty derives it from DATABASE_URL (sqlite -> sqlite+aiosqlite)
+    ASYNC_DATABASE_URL: str = ""
+    # "development" or "production" (gunicorn workers, see start_production.sh); picks the pool size defaults
+    DEPLOYMENT_MODE: str = "development"
+    # Connection pool per engine and process; unset sizes use the DEPLOYMENT_MODE defaults of db.POOL_SIZES
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    # SQLite pragmas set on every connection (see db.sqlite_pragmas)
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KIB: int = 64 * 1024
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # Companies an ingestion run fetches at once, and seconds a company may take before it is skipped
+    INGESTION_CONCURRENCY: int = 16
+    INGESTION_COMPANY_TIMEOUT: float = 120.0
+    # HTTP client shared by the scrapers of an ingestion run (see http_client.py): request timeout, connection
+    # pool size, seconds an idle connection is kept, and HTTP/2 where the optional h2 package is installed
+    HTTP_TIMEOUT: float = 30.0
+    HTTP_MAX_CONNECTIONS: int = 32
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 16
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2: bool = True
+    # Scraper requests per second per host (see rate_limit.py): RATE_LIMITS ({host or "*.domain": rate}) overrides
+    # the rate_limits of companies.yaml, other hosts get RATE_LIMIT_DEFAULT. Throttled hosts slow down to no less
+    # than RATE_LIMIT_MIN; a throttled request is retried up to RATE_LIMIT_MAX_RETRIES times unless its
+    # Retry-After exceeds RATE_LIMIT_MAX_WAIT seconds, in which case the host's requests fail until it runs out
+    RATE_LIMIT_DEFAULT: float = 5.0
+    RATE_LIMITS: Dict[str, float] = {}
+    RATE_LIMIT_MIN: float = 0.2
+    RATE_LIMIT_MAX_RETRIES: int = 3
+    RATE_LIMIT_MAX_WAIT: float = 60.0
+    # Jobs written per INSERT ... ON CONFLICT statement and transaction by db.bulk_upsert_jobs
+    UPSERT_BATCH_SIZE: int = 500
+    # How scheduled ingestion writes: "swap" builds the new corpus in staging tables and swaps it in (see
+    # staging.py), "incremental" upserts them in batches into the live tables
+    INGESTION_MODE: str = "swap"
+    # Seconds an ingestion run holds the lease that keeps other runs from writing at the same time; longer than
+    # any run, so that only a run whose process died lets it lapse
+    INGESTION_LEASE_SECONDS: float = 3 * 3600
+    # File locked by the one process of a host that runs the ingestion scheduler (the first gunicorn worker to
+    # start); empty puts it next to the SQLite database, or in the temporary directory for other databases
+    SCHEDULER_LOCK_FILE: str = ""
     # Comma-separated list of keywords to score relevance (simple example)
     KEYWORDS: str = "bioinformatics,computational biology,NGS,genomics,transcriptomics,proteomics,RNA-seq,variant calling,ML,machine learning,statistics,R,Python"
+    # Max (job content hash, query) scores kept by the in-process score cache
+    SCORE_CACHE_SIZE: int = 50000
+    # Max responses and total body bytes kept by the in-process response cache of read endpoints
+    RESPONSE_CACHE_SIZE: int = 2048
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # How much the stored domain score (0-100) boosts BM25 ranking of searches; 0 ranks by BM25 only
+    SEARCH_DOMAIN_WEIGHT: float = 0.5
+    # Search engine behind /api/jobs?q=: "index" (in-process inverted index) or "fts" (SQLite FTS5 / LIKE)
+    SEARCH_BACKEND: str = "index"
+    # Largest page /api/jobs serves; larger limits are capped, further rows come through X-Next-Cursor
+    MAX_PAGE_SIZE: int = 200
+    # Largest page /api/jobs streams as NDJSON, and the rows scored and sent per chunk
+    MAX_STREAM_PAGE_SIZE: int = 5000
+    STREAM_BATCH_SIZE: int = 200
+    # JSON responses at least this many bytes are gzip/brotli compressed when the client accepts it
+    COMPRESSION_MIN_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+    # Rows /api/export reads and encodes per chunk, and threads producing export chunks
+    EXPORT_BATCH_SIZE: int = 1000
+    EXPORT_WORKERS: int = 2
 
 settings = Settings()
@@ -0,0 +1,181 @@
+"""
+Shadow-table ingestion: a run builds its corpus in staging tables and swaps it in at the end.
+
+Scraped jobs are written with their derived fields, regions and job types
+to ``jobs_staging``, ``job_regions_staging`` and ``job_types_staging``,
+which no reader touches. Once they are loaded, the staging tables get
+their indexes and full-text index. Then ``swap`` renames them over the live
+tables in one transaction. Renames only rewrite the schema, so the swap
+takes milliseconds whatever the corpus size. Readers see the old corpus or
+the new one, never a mix, and in WAL mode they do not wait for it.
+
+Jobs keep their id across runs (matched by URL), so links, cursors and the
+in-memory search index stay valid. Only the holder of the ingestion lease
+(db.acquire_ingestion_lease) may use the staging tables. Jobs written to the live tables while a
+run is staging (POST /api/jobs) are replaced by the swap, just as an
+incremental run deletes the jobs it did not fetch.
+
+Swaps need SQLite (see ``swap_supported``); runs on other databases upsert
+into the live tables instead.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Column, ForeignKey, Index, MetaData, Table, UniqueConstraint, delete, func, inspect, insert, select, text
+
+from cache import score_cache
+from db import FTS_COLUMNS, FTS_TABLE, Job, JobRegion, JobType, create_fts_triggers, engine, fts_enabled, fts_table_sql, prepare_job
+from job_types import classify_job
+from regions import location_regions
+
+logger = logging.getLogger(__name__)
+
+LIVE_TABLES = (Job.__table__, JobRegion.__table__, JobType.__table__)
+STAGING_SUFFIX = "_staging"
+RETIRED_SUFFIX = "_retired"  # Live tables replaced by a swap, dropped right after it
+# Index names are global in SQLite, so staging indexes take the alternate name of whichever one the live table has
+ALTERNATE_INDEX_SUFFIX = "_alt"
+# Databases whose renames carry a staging table's constraints over to the live name. PostgreSQL constraint
+# and primary key names are global to the schema and survive renames, so they would clash from run to run
+SWAP_DIALECTS = ("sqlite",)
+
+
+def swap_supported() -> bool:
+    """Whether the configured database can make staged tables live with ``StagedCorpus.swap``."""
+    return engine.dialect.name in SWAP_DIALECTS
+
+
+def _staging_tables() -> Tuple[List[Table], Dict[str, List[Index]]]:
+    """Copies of the live job tables under staging names, and the indexes to build on each once it is loaded."""
+    metadata = MetaData()
+    tables, indexes = [], {}
+    for live in LIVE_TABLES:
+        columns = [
+            Column(column.name, column.type,
+                   *[ForeignKey(f"{fk.column.table.name}{STAGING_SUFFIX}.{fk.column.name}", ondelete=fk.ondelete)
+                     for fk in column.foreign_keys],
+                   primary_key=column.primary_key, nullable=column.nullable)
+            for column in live.columns
+        ]
+        constraints = [UniqueConstraint(*constraint.columns.keys(), name=constraint.name)
+                       for constraint in live.constraints if isinstance(constraint, UniqueConstraint)]
+        tables.append(Table(live.name + STAGING_SUFFIX, metadata, *columns, *constraints))
+        indexes[live.name] = list(live.indexes)
+    return tables, indexes
+
+
+def _index_name(name: str, in_use: Set[str]) -> str:
+    return name + ALTERNATE_INDEX_SUFFIX if name in in_use else name
+
+
+class StagedCorpus:
+    """New corpus of an ingestion run, written to staging tables by ``add`` and made live by ``swap``."""
+
+    def __init__(self):
+        self.tables, self.indexes = _staging_tables()
+        self.jobs, self.regions, self.types = self.tables
+        self.fts = fts_enabled()
+        self.live: Dict[str, Tuple[int, str, Optional[datetime]]] = {}  # url -> (id, content hash, posted_at) of the live jobs
+        self.next_id = 1
+        self.staged: Dict[str, int] = {}  # url -> id of the jobs staged by this run
+
+    def create(self) -> None:
+        """Create empty staging tables, dropping those a crashed run left behind.
+
+        Callers hold the ingestion lease, so no other run is using them.
+        """
+        self.discard()
+        with engine.begin() as conn:
+            self.jobs.metadata.create_all(conn)
+            rows = conn.execute(select(Job.url, Job.id, Job.content_hash, Job.posted_at)).all()
+            self.next_id = (conn.execute(select(func.max(Job.id))).scalar() or 0) + 1
+        self.live = {url: (job_id, job_hash, posted_at) for url, job_id, job_hash, posted_at in rows}
+        self.staged = {}
+
+    def add(self, jobs: Iterable[dict]) -> int:
+        """Stage annotated jobs in one transaction; returns how many were staged.
+
+        As with db.bulk_upsert_jobs, the last version of a URL wins (here or
+        in an earlier batch of the run), and a job sent without posted_at or
+        with unchanged content keeps the posted_at of its live row (scrapers
+        without a posting date send the fetch time).
+        """
+        now = datetime.utcnow()
+        latest = {job_data["url"]: job_data for job_data in jobs}  # Later duplicates replace earlier ones
+        restaged = [self.staged[url] for url in latest if url in self.staged]
+        job_rows, region_rows, type_rows = [], [], []
+        for job_data in latest.values():
+            job_data = prepare_job(job_data)
+            url = job_data["url"]
+            live = self.live.get(url)
+            if url in self.staged:
+                job_id = self.staged[url]
+            elif live is not None:
+                job_id = live[0]
+            else:
+                job_id, self.next_id = self.next_id, self.next_id + 1
+            if live is not None and live[1] != job_data["content_hash"]:
+                score_cache.invalidate(live[1])
+            # Model defaults (Job.posted_at, Job.score) for fields the scraper did not send
+            row = {"score": 0.0, **job_data, "id": job_id}
+            if live is not None and (row.get("posted_at") is None or live[1] == row["content_hash"]):
+                row["posted_at"] = live[2]
+            row["posted_at"] = row.get("posted_at") or now
+            job_rows.append({column.name: row.get(column.name) for column in self.jobs.columns})
+            region_rows += [{"job_id": job_id, "region": code} for code in location_regions(row.get("location"))]
+            type_rows += [{"job_id": job_id, "job_type": code} for code in classify_job(row)]
+            self.staged[url] = job_id
+        with engine.begin() as conn:
+            for table, column in ((self.types, "job_id"), (self.regions, "job_id"), (self.jobs, "id")):
+                if restaged:
+                    conn.execute(delete(table).where(table.c[column].in_(restaged)))
+            for table, rows in ((self.jobs, job_rows), (self.regions, region_rows), (self.types, type_rows)):
+                if rows:
+                    conn.execute(insert(table), rows)
+        return len(job_rows)
+
+    def build_indexes(self) -> None:
+        """Build the B-tree and full-text indexes of the loaded staging tables."""
+        with engine.begin() as conn:
+            in_use = {index["name"] for live in LIVE_TABLES for index in inspect(conn).get_indexes(live.name)}
+            for table in self.tables:
+                live_name = table.name[:-len(STAGING_SUFFIX)]
+                for index in self.indexes[live_name]:
+                    Index(_index_name(index.name, in_use), *[table.c[column.name] for column in index.columns],
+                          unique=index.unique).create(conn)
+            if self.fts:
+                columns = ", ".join(FTS_COLUMNS)
+                conn.execute(text(fts_table_sql(FTS_TABLE + STAGING_SUFFIX)))
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}{STAGING_SUFFIX}(rowid, {columns}) "
+                                  f"SELECT id, {columns} FROM {self.jobs.name}"))
+
+    def swap(self) -> int:
+        """Build the staging indexes, then make the staging tables live in one transaction; returns the job count."""
+        self.build_indexes()
+        renamed = [live.name for live in LIVE_TABLES] + ([FTS_TABLE] if self.fts else [])
+        with engine.connect() as conn:
+            if engine.dialect.name == "sqlite":
+                conn.exec_driver_sql("BEGIN IMMEDIATE")  # pysqlite does not open a transaction for DDL itself
+            if self.fts:
+                for suffix in ("ai", "ad", "au"):
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}"))
+            for name in renamed:
+                conn.execute(text(f"ALTER TABLE {name} RENAME TO {name}{RETIRED_SUFFIX}"))
+                conn.execute(text(f"ALTER TABLE {name}{STAGING_SUFFIX} RENAME TO {name}"))
+            if self.fts:
+                create_fts_triggers(conn)
+            conn.commit()
+        self._drop(RETIRED_SUFFIX)
+        return len(self.staged)
+
+    def discard(self) -> None:
+        """Drop the staging tables, and retired tables a crashed swap left behind."""
+        self._drop(STAGING_SUFFIX)
+        self._drop(RETIRED_SUFFIX)
+
+    def _drop(self, suffix: str) -> None:
+        with engine.begin() as conn:
+            for name in [FTS_TABLE] + [live.name for live in reversed(LIVE_TABLES)]:
+                conn.execute(text(f"DROP TABLE IF EXISTS {name}{suffix}"))
@@ -1,133 +1,400 @@
-from typing import List, Dict
+from typing import List, Dict, NamedTuple, FrozenSet, Iterable, Optional
+import hashlib
+import html
 import re
+import zlib
+from collections import Counter
 from settings import settings
 
 KEYWORDS = [k.strip().lower() for k in settings.KEYWORDS.split(',') if k.strip()]
 
-def score_job(job: Dict, search_query: str = None) -> float:
-    """Enhanced relevance scoring based on keyword matches in title + description with weighted priorities.
-    
-    Args:
-        job: Job dictionary with title, description, etc.
-        search_query: Optional search term to boost relevance for specific searches
+# High-priority bioinformatics keywords (higher weight)
+PRIMARY_KEYWORDS = [
+    'bioinformatics', 'bioinformatician', 'computational biology', 'computational biologist',
+    'genomics', 'transcriptomics', 'proteomics', 'metabolomics',
+    'ngs', 'rna-seq', 'chip-seq', 'atac-seq', 'single cell', 'single-cell',
+    'variant calling', 'gwas', 'metagenomics', 'phylogenetics',
+    'multi-omic', 'multiomics', 'epigenomics'
+]
+
+# Data science specific keywords
+DATA_SCIENCE_KEYWORDS = [
+    'data scientist', 'data science', 'machine learning engineer', 'ml engineer',
+    'data analyst', 'data engineer', 'analytics', 'statistician',
+    'artificial intelligence', 'ai engineer', 'deep learning', 'neural networks'
+]
+
+# Medium-priority technical keywords
+TECHNICAL_KEYWORDS = [
+    'python', 'r programming', 'perl', 'bash', 'linux',
+    'machine learning', 'deep learning', 'statistics', 'statistical',
+    'data science', 'algorithm', 'pipeline', 'workflow',
+    'docker', 'cloud computing', 'aws', 'gcp', 'azure',
+    'sql', 'pandas', 'numpy', 'scikit-learn', 'tensorflow', 'pytorch'
+]
+
+# Lower-priority general keywords
+GENERAL_KEYWORDS = [
+    'analysis', 'modeling', 'visualization', 'database',
+    'api', 'git', 'software engineering', 'automation'
+]
+
+# Wet-lab focused keywords (penalized for bioinformatics searches)
+WET_LAB_KEYWORDS = [
+    'wet lab', 'wetlab', 'laboratory technician', 'bench scientist', 'assay development',
+    'cell culture', 'molecular cloning', 'pcr', 'western blot',
+    'immunohistochemistry', 'flow cytometry', 'microscopy', 'lab technician'
+]
+
+# Query fragments that switch the primary tier to data science keywords
+DATA_SCIENCE_QUERY_TERMS = ['data scien', 'data analy', 'ml engineer', 'machine learning']
+
+
+def keyword_pattern(kw: str) -> str:
+    """Regex for a keyword; hyphens also match a space or nothing."""
+    return re.escape(kw).replace(r'\-', r'[-\s]?')
+
+
+class KeywordHits(NamedTuple):
+    """Keywords found in the title, the description and the joined text."""
+    title: FrozenSet[str]
+    description: FrozenSet[str]
+    combined: FrozenSet[str]
+
+
+class KeywordMatcher:
+    """Finds every keyword of every tier with one tokenizing pass per text.
+
+    Keywords are compiled once into a table keyed by the first word they can
+    start with (hyphenated keywords also match joined, e.g. 'rnaseq'). The
+    scan walks the words of the text and only tries the handful of keyword
+    regexes whose first word matches, so overlapping keywords such as
+    'machine learning' and 'machine learning engineer' are all reported.
     """
-    title = (job.get('title') or '').lower()
-    description = (job.get('description') or '').lower()
-    
+
+    WORD_RE = re.compile(r'\w+')
+
+    def __init__(self, keywords: List[str]):
+        self.keywords = list(dict.fromkeys(keywords))
+        self.by_first_word: Dict[str, List] = {}
+        for kw in self.keywords:
+            pattern = re.compile(keyword_pattern(kw) + r'\b')
+            for first_word in {self.WORD_RE.match(v).group() for v in self._variants(kw)}:
+                self.by_first_word.setdefault(first_word, []).append((kw, pattern))
+
+    @staticmethod
+    def _variants(kw: str) -> List[str]:
+        """Spellings of a keyword with each hyphen as '-', ' ' or nothing."""
+        variants = ['']
+        for part_idx, part in enumerate(kw.split('-')):
+            if part_idx == 0:
+                variants = [v + part for v in variants]
+            else:
+                variants = [v + sep + part for v in variants for sep in ('-', ' ', '')]
+        return variants
+
+    def scan(self, title: str, description: str) -> KeywordHits:
+        """Scan ``title + " " + description`` once and split hits by field.
+
+        Both texts are expected to be lower-cased already.
+        """
+        text = title + " " + description
+        title_end = len(title)
+        by_first_word = self.by_first_word
+        title_hits, desc_hits, combined = set(), set(), set()
+        for word in self.WORD_RE.finditer(text):
+            candidates = by_first_word.get(word.group())
+            if not candidates:
+                continue
+            start = word.start()
+            for kw, pattern in candidates:
+                m = pattern.match(text, start)
+                if m:
+                    combined.add(kw)
+                    if m.end() <= title_end:
+                        title_hits.add(kw)
+                    elif start > title_end:
+                        desc_hits.add(kw)
+        return KeywordHits(frozenset(title_hits), frozenset(desc_hits), frozenset(combined))
+
+
+KEYWORD_MATCHER = KeywordMatcher(
+    PRIMARY_KEYWORDS + DATA_SCIENCE_KEYWORDS + TECHNICAL_KEYWORDS + GENERAL_KEYWORDS + WET_LAB_KEYWORDS
+)
+
+
+def _query_term_score(title: str, description: str, search_query: Optional[str]) -> float:
+    """Score for the search terms themselves; title and description are lower-cased."""
     score = 0
-    
+
     # If there's a search query, prioritize exact matches
     if search_query and search_query.strip():
         query_terms = [term.strip().lower() for term in search_query.split() if term.strip()]
-        
+
         for term in query_terms:
             # Exact phrase match in title gets highest boost
             if term in title:
                 if len(term) > 3:  # Avoid boosting short common words
                     score += 15
-            # Exact phrase match in description gets medium boost  
+            # Exact phrase match in description gets medium boost
             elif term in description:
                 if len(term) > 3:
                     score += 8
-            
+
             # Partial word matches (for terms like "bioinformatics" matching "bioinformatician")
             title_words = title.split()
             desc_words = description.split()
-            
+
             for word in title_words:
                 if term in word and len(term) > 3:
                     score += 10
-            
+
             for word in desc_words:
                 if term in word and len(term) > 3:
                     score += 5
-    
-    # High-priority bioinformatics keywords (higher weight)
-    primary_keywords = [
-        'bioinformatics', 'bioinformatician', 'computational biology', 'computational biologist',
-        'genomics', 'transcriptomics', 'proteomics', 'metabolomics',
-        'ngs', 'rna-seq', 'chip-seq', 'atac-seq', 'single cell', 'single-cell',
-        'variant calling', 'gwas', 'metagenomics', 'phylogenetics',
-        'multi-omic', 'multiomics', 'epigenomics'
-    ]
-    
-    # Data science specific keywords
-    data_science_keywords = [
-        'data scientist', 'data science', 'machine learning engineer', 'ml engineer',
-        'data analyst', 'data engineer', 'analytics', 'statistician',
-        'artificial intelligence', 'ai engineer', 'deep learning', 'neural networks'
-    ]
-    
-    # Medium-priority technical keywords
-    technical_keywords = [
-        'python', 'r programming', 'perl', 'bash', 'linux',
-        'machine learning', 'deep learning', 'statistics', 'statistical',
-        'data science', 'algorithm', 'pipeline', 'workflow',
-        'docker', 'cloud computing', 'aws', 'gcp', 'azure',
-        'sql', 'pandas', 'numpy', 'scikit-learn', 'tensorflow', 'pytorch'
-    ]
-    
-    # Lower-priority general keywords
-    general_keywords = [
-        'analysis', 'modeling', 'visualization', 'database',
-        'api', 'git', 'software engineering', 'automation'
-    ]
-    
+
+    return score
+
+
+def job_vocabulary(job) -> Dict[str, Dict[str, int]]:
+    """Unique lower-cased words of the title and description with occurrence counts."""
+    return {
+        'title': dict(Counter(_field(job, 'title').split())),
+        'description': dict(Counter(_field(job, 'description').split())),
+    }
+
+
+def stored_vocabulary(job) -> Optional[Dict[str, Dict[str, int]]]:
+    vocabulary = job.get('vocabulary') if isinstance(job, dict) else getattr(job, 'vocabulary', None)
+    return vocabulary if isinstance(vocabulary, dict) else None
+
+
+def _vocabulary_term_score(vocabulary: Dict[str, Dict[str, int]], search_query: Optional[str]) -> float:
+    """``_query_term_score`` computed from a job vocabulary instead of the raw text.
+
+    Query terms contain no whitespace, so a term occurs in the text exactly
+    when it occurs in one of its words; every test runs over unique words
+    and multiplies by their counts.
+    """
+    score = 0
+    if not (search_query and search_query.strip()):
+        return score
+    title_words = vocabulary['title']
+    desc_words = vocabulary['description']
+    for term in (term.strip().lower() for term in search_query.split() if term.strip()):
+        if len(term) <= 3:  # Short terms never score
+            continue
+        title_count = sum(count for word, count in title_words.items() if term in word)
+        desc_count = sum(count for word, count in desc_words.items() if term in word)
+        if title_count:
+            score += 15
+        elif desc_count:
+            score += 8
+        score += 10 * title_count + 5 * desc_count
+    return score
+
+
+def _is_data_science_query(search_query: Optional[str]) -> bool:
+    if not search_query:
+        return False
+    query_lower = search_query.lower()
+    return any(term in query_lower for term in DATA_SCIENCE_QUERY_TERMS)
+
+
+def score_job(job: Dict, search_query: str = None) -> float:
+    """Enhanced relevance scoring based on keyword matches in title + description with weighted priorities.
+
+    Args:
+        job: Job dictionary with title, description, etc.
+        search_query: Optional search term to boost relevance for specific searches
+    """
+    title = (job.get('title') or '').lower()
+    description = (job.get('description') or '').lower()
+
+    score = _query_term_score(title, description, search_query)
+
     # Choose keyword set based on search query context
-    if search_query:
-        query_lower = search_query.lower()
-        if any(term in query_lower for term in ['data scien', 'data analy', 'ml engineer', 'machine learning']):
-            # Boost data science keywords for data science searches
-            primary_keywords = data_science_keywords + primary_keywords
-        elif any(term in query_lower for term in ['bioinformatics', 'computational biology', 'genomics']):
-            # Keep bioinformatics keywords as primary for bio searches
-            pass
-    
+    primary_keywords = PRIMARY_KEYWORDS
+    if _is_data_science_query(search_query):
+        # Boost data science keywords for data science searches
+        primary_keywords = DATA_SCIENCE_KEYWORDS + PRIMARY_KEYWORDS
+
+    # One pass over title + description finds every keyword of every tier
+    hits = KEYWORD_MATCHER.scan(title, description)
+
     # Score title matches (higher weight for title)
     for kw in primary_keywords:
-        # Use word boundaries but handle hyphenated terms
-        pattern = r'\b' + re.escape(kw).replace(r'\-', r'[-\s]?') + r'\b'
-        if re.search(pattern, title):
+        if kw in hits.title:
             score += 10  # High weight for primary keywords in title
-        elif re.search(pattern, description):
+        elif kw in hits.description:
             score += 5   # Medium weight for primary keywords in description
-    
-    for kw in technical_keywords:
-        pattern = r'\b' + re.escape(kw).replace(r'\-', r'[-\s]?') + r'\b'
-        if re.search(pattern, title):
+
+    for kw in TECHNICAL_KEYWORDS:
+        if kw in hits.title:
             score += 3   # Medium weight for technical keywords in title
-        elif re.search(pattern, description):
+        elif kw in hits.description:
             score += 1   # Low weight for technical keywords in description
-    
-    for kw in general_keywords:
-        pattern = r'\b' + re.escape(kw).replace(r'\-', r'[-\s]?') + r'\b'
-        if re.search(pattern, title):
+
+    for kw in GENERAL_KEYWORDS:
+        if kw in hits.title:
             score += 1   # Low weight for general keywords in title
-        elif re.search(pattern, description):
+        elif kw in hits.description:
             score += 0.5 # Very low weight for general keywords in description
-    
+
     # Bonus for multiple relevant indicators
-    relevant_indicators = sum(1 for kw in primary_keywords[:12] 
-                            if re.search(r'\b' + re.escape(kw).replace(r'\-', r'[-\s]?') + r'\b', 
-                                       title + " " + description))
+    relevant_indicators = sum(1 for kw in primary_keywords[:12] if kw in hits.combined)
     if relevant_indicators >= 3:
         score += 5  # Bonus for jobs with multiple relevant indicators
-    
+
     # Penalty for wet-lab focused roles (only for bioinformatics searches)
     if not search_query or 'bioinformatics' in search_query.lower():
-        wet_lab_keywords = [
-            'wet lab', 'wetlab', 'laboratory technician', 'bench scientist', 'assay development',
-            'cell culture', 'molecular cloning', 'pcr', 'western blot',
-            'immunohistochemistry', 'flow cytometry', 'microscopy', 'lab technician'
-        ]
-        
-        wet_lab_mentions = sum(1 for kw in wet_lab_keywords 
-                              if re.search(r'\b' + re.escape(kw).replace(r'\-', r'[-\s]?') + r'\b', 
-                                         title + " " + description))
-        
+        wet_lab_mentions = sum(1 for kw in WET_LAB_KEYWORDS if kw in hits.combined)
+
         # Apply penalty if wet-lab keywords are prominent but bioinformatics is not in title
-        if wet_lab_mentions >= 2 and not any(re.search(r'\b' + re.escape(kw).replace(r'\-', r'[-\s]?') + r'\b', title) 
-                                             for kw in primary_keywords[:4]):  # Only check core bioinformatics terms
+        if wet_lab_mentions >= 2 and not any(kw in hits.title for kw in primary_keywords[:4]):  # Only check core bioinformatics terms
             score = score * 0.3  # Reduce score significantly for wet-lab heavy roles
-    
+
     return float(max(0, min(100, score * 2)))  # Scale to 0-100 range
+
+
+# Tiers stored as hit bitmaps in Job.features; bit i is keyword i of the tier
+KEYWORD_TIERS = {
+    'primary': PRIMARY_KEYWORDS,
+    'data_science': DATA_SCIENCE_KEYWORDS,
+    'technical': TECHNICAL_KEYWORDS,
+    'general': GENERAL_KEYWORDS,
+}
+
+# Stored features are recomputed whenever the keyword lists change
+FEATURES_VERSION = zlib.crc32(repr((KEYWORD_TIERS, WET_LAB_KEYWORDS)).encode())
+
+
+def _field(job, name: str) -> str:
+    """Read a text field from a job dict or an ORM row."""
+    value = job.get(name) if isinstance(job, dict) else getattr(job, name, None)
+    return (value or '').lower()
+
+
+def content_hash(job) -> str:
+    """Hash of the fields scoring depends on (title and description)."""
+    title = job.get('title') if isinstance(job, dict) else getattr(job, 'title', None)
+    description = job.get('description') if isinstance(job, dict) else getattr(job, 'description', None)
+    return hashlib.sha1(f"{title or ''}\x00{description or ''}".encode()).hexdigest()
+
+
+def _bitmap(keywords: List[str], hits: FrozenSet[str]) -> int:
+    return sum(1 << i for i, kw in enumerate(keywords) if kw in hits)
+
+
+def job_features(job) -> Dict:
+    """Compute the query-independent keyword features of a job.
+
+    Holds title and description hit bitmaps per keyword tier, the
+    multi-indicator counts for both possible primary tiers and the wet-lab
+    keyword count. Stored on the Job row at ingestion time.
+    """
+    hits = KEYWORD_MATCHER.scan(_field(job, 'title'), _field(job, 'description'))
+    return {
+        'version': FEATURES_VERSION,
+        'title': {tier: _bitmap(keywords, hits.title) for tier, keywords in KEYWORD_TIERS.items()},
+        'description': {tier: _bitmap(keywords, hits.description) for tier, keywords in KEYWORD_TIERS.items()},
+        'indicators': {
+            'primary': sum(1 for kw in PRIMARY_KEYWORDS[:12] if kw in hits.combined),
+            'data_science': sum(1 for kw in DATA_SCIENCE_KEYWORDS[:12] if kw in hits.combined),
+        },
+        'wet_lab': sum(1 for kw in WET_LAB_KEYWORDS if kw in hits.combined),
+    }
+
+
+def stored_features(job) -> Optional[Dict]:
+    """Return the features persisted with a job if they are current."""
+    features = job.get('features') if isinstance(job, dict) else getattr(job, 'features', None)
+    if isinstance(features, dict) and features.get('version') == FEATURES_VERSION:
+        return features
+    return None
+
+
+def _popcount(bitmap: int) -> int:
+    return bin(bitmap).count('1')
+
+
+def _feature_score(features: Dict, term_score: float, data_science: bool, penalize: bool) -> float:
+    """``score_job`` from stored keyword features plus the query-term component, before scaling."""
+    score = term_score
+
+    # (tier, title weight, description weight); data science searches promote that tier to primary
+    tier_weights = [('data_science', 10, 5)] if data_science else []
+    tier_weights += [('primary', 10, 5), ('technical', 3, 1), ('general', 1, 0.5)]
+    for tier, title_weight, desc_weight in tier_weights:
+        in_title = features['title'][tier]
+        score += title_weight * _popcount(in_title) + desc_weight * _popcount(features['description'][tier] & ~in_title)
+
+    # Bonus for multiple relevant indicators
+    primary_tier = 'data_science' if data_science else 'primary'
+    if features['indicators'][primary_tier] >= 3:
+        score += 5
+
+    # Penalty for wet-lab focused roles unless the first four keywords of the primary tier are in the title
+    if penalize and features['wet_lab'] >= 2 and not features['title'][primary_tier] & 0b1111:
+        score = score * 0.3
+    return score
+
+
+def score_jobs(jobs: Iterable, search_query: str = None) -> List[float]:
+    """Score many jobs (dicts or ``Job`` rows) at once; same results as ``score_job``.
+
+    The speedup over ``score_job`` comes from the features stored with each
+    job at ingestion (see ``job_features``): the keyword tiers are applied
+    to their hit bitmaps instead of scanning the text, and the query-term
+    component runs over the stored vocabulary. Jobs without current stored
+    features (e.g. raw scraped dicts) simply go through ``score_job``.
+    """
+    has_query = bool(search_query and search_query.strip())
+    data_science = _is_data_science_query(search_query)
+    penalize = not search_query or 'bioinformatics' in search_query.lower()
+    scores = []
+    for job in jobs:
+        features = stored_features(job)
+        if features is None:
+            scores.append(score_job({'title': _field(job, 'title'), 'description': _field(job, 'description')}, search_query))
+            continue
+        term_score = 0
+        if has_query:
+            vocabulary = stored_vocabulary(job)
+            term_score = (_vocabulary_term_score(vocabulary, search_query) if vocabulary is not None
+                          else _query_term_score(_field(job, 'title'), _field(job, 'description'), search_query))
+        score = _feature_score(features, term_score, data_science, penalize)
+        scores.append(float(max(0, min(100, score * 2))))  # Scale to 0-100 range
+    return scores
+
+
+# Plain-text description excerpt shown in job lists
+SNIPPET_LENGTH = 280
+TAG_RE = re.compile(r'<[^>]*>')
+
+
+def job_snippet(description: Optional[str], length: int = SNIPPET_LENGTH) -> str:
+    """Plain-text start of a description, cut at a word boundary.
+
+    Scraped descriptions are often HTML whose markup is itself escaped
+    (Greenhouse ``content``), so entities are decoded twice before tags are
+    dropped and whitespace collapsed.
+    """
+    text = html.unescape(html.unescape(description or ''))
+    text = ' '.join(TAG_RE.sub(' ', text).split())
+    if len(text) <= length:
+        return text
+    cut = text.rfind(' ', 0, length)
+    return text[:cut if cut > length // 2 else length].rstrip() + '…'
+
+
+def annotate_jobs(jobs: List[Dict]) -> List[Dict]:
+    """Attach features, vocabulary, content hash, snippet and the default score to scraped job dicts."""
+    for job in jobs:
+        job['snippet'] = job_snippet(job.get('description'))
+        job['features'] = job_features(job)
+        job['vocabulary'] = job_vocabulary(job)
+        job['content_hash'] = content_hash(job)
+    for job, score in zip(jobs, score_jobs(jobs)):
+        job['score'] = float(score)
+    return jobs
@@ -1,4 +1,5 @@
 #!/bin/bash
 cd backend
 source ../.venv/bin/activate
+export DEPLOYMENT_MODE=${DEPLOYMENT_MODE:-production}  # Pool sizes for several workers, see backend/db.py
 exec gunicorn -w 4 -k uvicorn.workers.UvicornWorker app:app --bind 0.0.0.0:8000